@@ -13,52 +13,69 @@ logger = logging.getLogger(__name__)
 # ============================
 # Core modules
 # ============================
+# Only the lightweight UI modules are imported up front. The ML stack
+# (nltk, sklearn, pandas) and the Home page's plotting imports (plotly) are
+# deferred until the Home page is first rendered, so the app comes up fast
+# and the About/Help/Contact pages never pay for them.
 from src.design import setup_page, render_header, render_sidebar
-from src.nlp import setup_nltk, get_stopwords
-from src.model import load_model
-from src.analysis import load_word_lists
 
 # ============================
 # Page modules - Import directly to avoid circular imports
 # ============================
-from src.pages.home import render_home_page
 from src.pages.info_section import render_info_sections
 from src.pages.about import render_about_page
 from src.pages.help import render_help_page
 from src.pages.contact import render_contact_page
 
 
-@st.cache_data(show_spinner=False)
+# Model objects, stopwords and word lists are shared by every session as
+# one instance each (st.cache_resource). st.cache_data would pickle and
+# copy them into every rerun of every session. They are treated as
+# read-only; the sets are frozen so that cannot change by accident.
+@st.cache_resource(show_spinner=False)
+def _model_registry():
+    """Process-wide model registry (reloads the model when its files change)."""
+    from src.registry import ModelRegistry
+
+    return ModelRegistry()
+
+
 def _cached_load_model():
-    """Load model and vectorizer once per session."""
+    """Current model and vectorizer, shared across sessions."""
     try:
-        return load_model()
+        snapshot = _model_registry().get("default")
     except FileNotFoundError as e:
         logger.error(f"Model files not found: {e}")
         raise
     except Exception as e:
         logger.error(f"Error loading model: {e}")
         raise
+    return snapshot.tfidf, snapshot.model
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def _cached_get_stopwords():
-    """Load NLTK stopwords once per session."""
+    """Load NLTK stopwords once per process."""
+    from src.nlp import get_stopwords
+
     try:
-        return get_stopwords()
+        return frozenset(get_stopwords())
     except Exception as e:
         logger.warning(f"Error loading stopwords: {e}")
-        return set()
+        return frozenset()
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def _cached_word_lists():
-    """Load spam/ham word lists once per session."""
+    """Load spam/ham word lists once per process."""
+    from src.analysis import load_word_lists
+
     try:
-        return load_word_lists()
+        spam_words, ham_words = load_word_lists()
+        return frozenset(spam_words), frozenset(ham_words)
     except Exception as e:
         logger.warning(f"Error loading word lists: {e}")
-        return set(), set()
+        return frozenset(), frozenset()
 
 
 def main():
@@ -86,6 +103,9 @@ def main():
     # 3. Initialize NLP resources (only needed for Home page)
     # ----------------------------
     if page == "🏠 Home":
+        from src.nlp import setup_nltk
+        from src.pages.home import render_home_page
+
         setup_nltk()
         stop_words = _cached_get_stopwords()
         tfidf, model = _cached_load_model()
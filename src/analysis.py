@@ -3,6 +3,11 @@ import pandas as pd
 from pathlib import Path
 from collections import Counter
 
+from src.patterns import CORE_SPAM_PATTERNS, find_keywords, pattern_flags
+
+URL_RE = re.compile(r'http[s]?://\S+')
+NUMBER_RE = re.compile(r'\d+')
+
 
 def _data_dir() -> Path:
     """Resolve data directory relative to project root."""
@@ -10,7 +15,7 @@ def _data_dir() -> Path:
 
 
 def load_word_lists():
-    """Load spam/ham word sets from CSV. Use with st.cache_data in app."""
+    """Load spam/ham word sets from CSV. Shared via st.cache_resource in app."""
     base = _data_dir()
     spam_path = base / "top_30_most_used_spam_words.csv"
     ham_path = base / "top_30_most_used_ham_words.csv"
@@ -39,15 +44,10 @@ def analyze_message(raw_text, processed_words, spam_words_set=None, ham_words_se
     if ham_words_set is None:
         ham_words_set = set()
     
-    urls = re.findall(r'http[s]?://\S+', raw_text)
-    numbers = re.findall(r'\d+', raw_text)
-
-    spam_patterns = {
-        'Free/Freebie': bool(re.search(r'\bfree\b', raw_text, re.I)),
-        'Win/Prize': bool(re.search(r'\b(win|won|prize)\b', raw_text, re.I)),
-        'Urgent': bool(re.search(r'\burgent\b', raw_text, re.I)),
-        'Click': bool(re.search(r'\bclick\b', raw_text, re.I)),
-    }
+    urls = URL_RE.findall(raw_text)
+    numbers = NUMBER_RE.findall(raw_text)
+
+    spam_patterns = pattern_flags(CORE_SPAM_PATTERNS, find_keywords(raw_text))
 
     found_spam = [w for w in processed_words if w in spam_words_set]
     found_ham = [w for w in processed_words if w in ham_words_set]
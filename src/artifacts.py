@@ -0,0 +1,193 @@
+"""
+Pickle-free model artifacts.
+
+export_artifacts() writes a fitted TF-IDF vectorizer and linear/NB
+classifier as plain data:
+
+    Models/artifacts/{name}/
+      manifest.json     format version, vectorizer settings, bias, checksums
+      vocabulary.json   feature terms, ordered by column index
+      idf.npy           idf weights (absent when use_idf is off)
+      weight_diff.npy   per-feature spam-minus-ham weight
+
+load_scorer() verifies the checksums, memory-maps the arrays and returns a
+FastScorer. Nothing is unpickled and sklearn is never imported, so loading
+is fast, safe on untrusted files and independent of the sklearn version
+that trained the model.
+
+    python -m src.artifacts export --model default
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from src.scorer import FastScorer
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+# Vectorizer settings FastScorer cannot reproduce, recorded with the only
+# values an artifact may hold so a manifest documents every input to its scores
+FIXED_SETTINGS = {"preprocessor": None, "tokenizer": None, "stop_words": None, "dtype": "float64"}
+
+
+def artifact_dir(model_name: str = "default") -> Path:
+    """Default artifact directory for a model name (Models/artifacts/{name})."""
+    return Path(__file__).resolve().parent.parent / "Models" / "artifacts" / model_name
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def export_artifacts(tfidf, model, out_dir: Union[str, Path]) -> Path:
+    """Write tfidf + model to out_dir in the artifact format. Returns the manifest path.
+
+    Raises ValueError for vectorizer settings FastScorer does not reproduce
+    (see src.scorer.unsupported_settings), so an artifact always scores
+    like the pickles it came from.
+    """
+    # Validates the estimators and extracts the arrays in one place
+    scorer = FastScorer.from_estimators(tfidf, model)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    terms: List[str] = [""] * len(scorer.vocabulary)
+    for term, idx in scorer.vocabulary.items():
+        terms[idx] = term
+    files: Dict[str, str] = {}
+    with open(out / "vocabulary.json", "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False)
+    files["vocabulary"] = "vocabulary.json"
+    np.save(out / "weight_diff.npy", np.ascontiguousarray(scorer.weight_diff, dtype=np.float64))
+    files["weight_diff"] = "weight_diff.npy"
+    if scorer.idf is not None:
+        np.save(out / "idf.npy", np.ascontiguousarray(scorer.idf, dtype=np.float64))
+        files["idf"] = "idf.npy"
+
+    manifest: Dict[str, Any] = {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(model).__name__,
+        "vectorizer_type": type(tfidf).__name__,
+        "n_features": len(terms),
+        "bias": scorer.bias,
+        "sublinear_tf": scorer.sublinear_tf,
+        "norm": scorer.norm,
+        "lowercase": scorer.lowercase,
+        "token_pattern": scorer.token_pattern,
+        "binary": scorer.binary,
+        "strip_accents": scorer.strip_accents,
+        **FIXED_SETTINGS,
+        "files": {role: {"name": name, "sha256": _sha256(out / name)} for role, name in files.items()},
+    }
+    manifest_path = out / MANIFEST
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def read_manifest(path: Union[str, Path]) -> Dict[str, Any]:
+    """Read and sanity-check an artifact manifest (directory or manifest.json path)."""
+    path = Path(path)
+    manifest_path = path / MANIFEST if path.is_dir() else path
+    if not manifest_path.is_file():
+        raise FileNotFoundError(f"Artifact manifest not found: {manifest_path}")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    version = manifest.get("format_version")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact format version {version!r} (expected {FORMAT_VERSION}); "
+            "re-export with python -m src.artifacts export"
+        )
+    for name, value in FIXED_SETTINGS.items():
+        if manifest.get(name, value) != value:
+            raise ValueError(f"Artifact {manifest_path} has unsupported vectorizer setting {name}={manifest[name]!r}")
+    return manifest
+
+
+def load_scorer(path: Optional[Union[str, Path]] = None, verify: bool = True, mmap: bool = True) -> FastScorer:
+    """Load a FastScorer from an artifact directory (default: the default model's).
+
+    verify checks every file against its manifest checksum and raises
+    ValueError on a mismatch. With mmap the arrays are memory-mapped
+    read-only instead of copied into memory.
+    """
+    base = Path(path) if path is not None else artifact_dir()
+    manifest = read_manifest(base)
+    if base.is_file():
+        base = base.parent
+    files = manifest["files"]
+    if verify:
+        for role, info in files.items():
+            if _sha256(base / info["name"]) != info["sha256"]:
+                raise ValueError(f"Checksum mismatch for {role} file {base / info['name']}")
+
+    mode = "r" if mmap else None
+    with open(base / files["vocabulary"]["name"], encoding="utf-8") as f:
+        terms = json.load(f)
+    weight_diff = np.load(base / files["weight_diff"]["name"], mmap_mode=mode, allow_pickle=False)
+    idf = None
+    if "idf" in files:
+        idf = np.load(base / files["idf"]["name"], mmap_mode=mode, allow_pickle=False)
+    n = manifest["n_features"]
+    if len(terms) != n or weight_diff.shape != (n,) or (idf is not None and idf.shape != (n,)):
+        raise ValueError(f"Artifact arrays in {base} do not match n_features={n}")
+
+    return FastScorer(
+        vocabulary={term: i for i, term in enumerate(terms)},
+        idf=idf,
+        weight_diff=weight_diff,
+        bias=manifest["bias"],
+        sublinear_tf=manifest["sublinear_tf"],
+        norm=manifest["norm"],
+        lowercase=manifest["lowercase"],
+        token_pattern=manifest["token_pattern"],
+        binary=manifest["binary"],
+        strip_accents=manifest["strip_accents"],
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.artifacts", description="Export or check model artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Convert a pickled model into the artifact format")
+    export.add_argument("--model", default="default", help="Model name passed to load_model")
+    export.add_argument("--out", type=Path, help="Output directory (default: Models/artifacts/{model})")
+    verify = sub.add_parser("verify", help="Check an artifact directory's checksums")
+    verify.add_argument("path", type=Path)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        if args.command == "export":
+            from src.model import load_model  # unpickling needs sklearn; only here
+
+            tfidf, model = load_model(args.model)
+            manifest = export_artifacts(tfidf, model, args.out or artifact_dir(args.model))
+            logger.info("Wrote %s", manifest)
+        else:
+            scorer = load_scorer(args.path)
+            logger.info("%s OK (%d features)", args.path, len(scorer.vocabulary))
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Micro-batching queue for scoring requests.
+
+Concurrent single-message requests are collected for up to max_wait_ms or
+max_batch_size items, scored with one call to a batch function (one sparse
+matrix, one model call), and the results are fanned back to the waiting
+callers through futures.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class QueueFullError(RuntimeError):
+    """Raised by submit() when the pending queue is at max_queue_size."""
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group individual items into batches for a vectorized batch function.
+
+    batch_fn receives a list of items and must return one result per item,
+    in order. If it raises, every caller in that batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 10_000,
+        name: str = "micro-batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._max_queue_depth = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+    def submit(self, item: T) -> "Future[R]":
+        """Queue one item and return a Future for its result."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future: "Future[R]" = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise QueueFullError(f"Batch queue is full ({self.max_queue_size} pending)")
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+        return future
+
+    def score(self, item: T, timeout: Optional[float] = None) -> R:
+        """Submit one item and block until its batch has been scored."""
+        return self.submit(item).result(timeout)
+
+    async def score_async(self, item: T) -> R:
+        """Awaitable variant of score() for asyncio callers."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _collect(self) -> Tuple[List[Tuple[T, "Future[R]"]], bool]:
+        """Block for the first item, then gather more until size or time limit."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is _STOP:
+                return batch, True
+            batch.append(nxt)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._score_batch(batch)
+
+    def _score_batch(self, batch: List[Tuple[T, "Future[R]"]]):
+        # Skip callers that gave up (cancelled) before the batch ran
+        live = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        with self._lock:
+            self._batches += 1
+            self._items += len(live)
+            self._largest_batch = max(self._largest_batch, len(live))
+        try:
+            results = self.batch_fn([item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(
+                    f"batch_fn returned {len(results)} results for {len(live)} items"
+                )
+        except BaseException as e:
+            for _, fut in live:
+                fut.set_exception(e)
+            return
+        for (_, fut), result in zip(live, results):
+            fut.set_result(result)
+
+    # ------------------------------------------------------------------
+    # Lifecycle and metrics
+    # ------------------------------------------------------------------
+    def close(self, timeout: Optional[float] = None):
+        """Score anything already queued, then stop the worker thread.
+
+        Items that raced close() into the queue behind the stop marker get
+        a RuntimeError instead of waiting forever.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            return
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP and entry[1].set_running_or_notify_cancel():
+                entry[1].set_exception(RuntimeError("MicroBatcher is closed"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batching counters."""
+        with self._lock:
+            batches, items = self._batches, self._items
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": batches,
+                "items": items,
+                "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+            }
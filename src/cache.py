@@ -0,0 +1,180 @@
+"""
+Content-hash result cache for scored messages.
+
+Spam campaigns repeat the same body many times, so scoring results are
+cached under a hash of the normalized message text plus a namespace naming
+the model, its version and the tokenizer. Entries hold the [ham, spam]
+probabilities and, when it was requested, the explanation; labels are
+derived from the probabilities at read time so any threshold can be served
+from the same entry.
+
+Two tiers:
+  - an in-memory LRU (max_entries=0 keeps nothing in memory)
+  - an optional sqlite file that survives restarts and is shared by
+    processes pointing at the same path
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+DEFAULT_CACHE_SIZE = 100_000
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a message used for cache keys.
+
+    transformed_text lowercases and tokenizes on whitespace, so messages
+    differing only in case or spacing score identically.
+    """
+    return " ".join(text.lower().split())
+
+
+def cache_key(text: str, namespace: str = "") -> str:
+    """Hex digest identifying a message's normalized text within a namespace."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(namespace.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8", errors="surrogatepass"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU of scoring results with an optional sqlite tier."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, path: Optional[Union[str, Path]] = None):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """Look up several keys; misses are None."""
+        with self._lock:
+            out: List[Optional[Dict[str, Any]]] = []
+            missing: List[int] = []
+            for i, key in enumerate(keys):
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                else:
+                    missing.append(i)
+                out.append(value)
+            if missing and self._db is not None:
+                wanted = list({keys[i] for i in missing})
+                found: Dict[str, Dict[str, Any]] = {}
+                # Stay under sqlite's bound-parameter limit
+                for start in range(0, len(wanted), 500):
+                    part = wanted[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(part))})", part
+                    )
+                    found.update((k, json.loads(v)) for k, v in rows)
+                for i in missing:
+                    value = found.get(keys[i])
+                    if value is not None:
+                        out[i] = value
+                        self._remember(keys[i], value)
+                        self._disk_hits += 1
+            n_hits = sum(v is not None for v in out)
+            self._hits += n_hits
+            self._misses += len(out) - n_hits
+            return out
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([key])[0]
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        """Store several key -> result entries in both tiers."""
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                    [(k, json.dumps(v)) for k, v in items.items()],
+                )
+                self._db.commit()
+
+    def put(self, key: str, value: Dict[str, Any]):
+        self.put_many({key: value})
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "path": str(self.path) if self.path else None,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def score_with_cache(
+    texts: Sequence[str],
+    compute: Callable[[List[str]], List[Dict[str, Any]]],
+    cache: Optional[ResultCache] = None,
+    namespace: str = "",
+    explain: bool = False,
+) -> List[Dict[str, Any]]:
+    """Return one result entry per text, computing only the cache misses.
+
+    compute(texts) must return entries ({"probabilities": [ham, spam]} plus
+    "explanation" when explain is set) in order. An entry cached without an
+    explanation is recomputed when one is requested. Repeated texts within
+    the batch are computed once.
+    """
+    if cache is None:
+        return compute(list(texts))
+    keys = [cache_key(t, namespace) for t in texts]
+    entries = cache.get_many(keys)
+    pending: Dict[str, int] = {}
+    for i, (key, entry) in enumerate(zip(keys, entries)):
+        if entry is None or (explain and "explanation" not in entry):
+            pending.setdefault(key, i)
+    if pending:
+        fresh = compute([texts[i] for i in pending.values()])
+        computed = dict(zip(pending, fresh))
+        cache.put_many(computed)
+        entries = [computed.get(key, entry) for key, entry in zip(keys, entries)]
+    return entries
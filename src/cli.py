@@ -0,0 +1,222 @@
+"""
+Command-line bulk scorer.
+
+    python -m src.cli score Data/raw/spam.csv --encoding latin-1 -o scores.csv
+    python -m src.cli score quarantine.mbox -o scores.jsonl --tokenizer regex
+    python -m src.cli score ~/Maildir -o scores.csv
+
+Messages are streamed from the input, scored in fixed-size chunks through
+the batch path and written out chunk by chunk, so memory stays flat no
+matter how large the input is. Email inputs (.eml, mbox, Maildir) also get
+sender, subject and SPF/DKIM/DMARC columns.
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from src.cache import DEFAULT_CACHE_SIZE, ResultCache, score_with_cache
+from src.ingest import EMAIL_FORMATS, INPUT_FORMATS, chunked, detect_format, iter_messages
+from src.model import (
+    DEFAULT_THRESHOLD,
+    explain_batch,
+    load_model,
+    model_version,
+    score_vectors,
+    vectorize_batch,
+)
+from src.nlp import PARALLEL_MIN_BATCH, TOKENIZERS, PreprocessPool, get_stopwords, setup_nltk
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ("csv", "jsonl")
+OUTPUT_FIELDS = ["id", "label", "prediction", "spam_probability", "ham_probability", "confidence"]
+# Extra columns for email inputs: output field -> extracted header
+HEADER_FIELDS = {"from": "From", "subject": "Subject", "spf": "SPF", "dkim": "DKIM", "dmarc": "DMARC"}
+LABELS = {0: "ham", 1: "spam"}
+
+
+class _Writer:
+    """Incremental CSV or JSONL result writer."""
+
+    def __init__(self, stream: TextIO, fmt: str, explain: bool = False, headers: bool = False):
+        self.stream = stream
+        self.fmt = fmt
+        self.explain = explain
+        self._csv: Optional[csv.DictWriter] = None
+        if fmt == "csv":
+            fields = OUTPUT_FIELDS + (list(HEADER_FIELDS) if headers else [])
+            fields += ["top_spam_words", "top_ham_words"] if explain else []
+            self._csv = csv.DictWriter(stream, fieldnames=fields)
+            self._csv.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            if self._csv is not None:
+                if self.explain:
+                    exp = row.pop("explanation", {"positive": [], "negative": []})
+                    row["top_spam_words"] = " ".join(w for w, _ in exp["positive"])
+                    row["top_ham_words"] = " ".join(w for w, _ in exp["negative"])
+                self._csv.writerow(row)
+            else:
+                self.stream.write(json.dumps(row) + "\n")
+        self.stream.flush()
+
+
+def score_messages(
+    messages: Iterable[Dict[str, Any]],
+    tfidf,
+    model,
+    stop_words,
+    chunk_size: int = 1000,
+    threshold: float = DEFAULT_THRESHOLD,
+    tokenizer: str = "nltk",
+    explain: bool = False,
+    pool: Optional[PreprocessPool] = None,
+    cache: Optional[ResultCache] = None,
+    cache_namespace: str = "",
+) -> Iterable[List[Dict[str, Any]]]:
+    """Score a message stream chunk by chunk, yielding lists of result rows.
+
+    With a ResultCache, repeated message bodies are scored once and served
+    from the cache afterwards (also across runs when it is sqlite-backed).
+    """
+    def compute(texts: List[str]) -> List[Dict[str, Any]]:
+        vectors = vectorize_batch(texts, tfidf, stop_words=stop_words, tokenizer=tokenizer, pool=pool)
+        _, probas = score_vectors(vectors, model)
+        explanations = explain_batch(vectors, tfidf, model, top_k=5) if explain else None
+        entries = []
+        for i, proba in enumerate(probas):
+            entry: Dict[str, Any] = {"probabilities": [float(proba[0]), float(proba[1])]}
+            if explanations is not None:
+                entry["explanation"] = explanations[i]
+            entries.append(entry)
+        return entries
+
+    for chunk in chunked(messages, chunk_size):
+        entries = score_with_cache([m["text"] for m in chunk], compute, cache, cache_namespace, explain)
+        rows = []
+        for msg, entry in zip(chunk, entries):
+            ham, spam = entry["probabilities"]
+            pred = int(spam > threshold)
+            row: Dict[str, Any] = {
+                "id": msg["id"],
+                "label": LABELS.get(pred, str(pred)),
+                "prediction": pred,
+                "spam_probability": round(spam, 6),
+                "ham_probability": round(ham, 6),
+                "confidence": round(spam if pred else ham, 6),
+            }
+            if msg.get("headers"):
+                row.update((field, msg["headers"].get(name, "")) for field, name in HEADER_FIELDS.items())
+            if explain:
+                row["explanation"] = entry["explanation"]
+            rows.append(row)
+        yield rows
+
+
+def _cmd_score(args) -> int:
+    in_fmt = args.format or detect_format(args.input)
+    messages = iter_messages(
+        args.input,
+        in_fmt,
+        text_column=args.text_column,
+        id_column=args.id_column,
+        encoding=args.encoding,
+    )
+
+    setup_nltk(punkt=args.tokenizer == "nltk")
+    stop_words = get_stopwords()
+    tfidf, model = load_model(args.model)
+
+    out_fmt = args.output_format
+    if out_fmt is None:
+        out_fmt = "jsonl" if args.output and Path(args.output).suffix.lower() in (".jsonl", ".ndjson") else "csv"
+
+    stream = sys.stdout if args.output in (None, "-") else open(args.output, "w", newline="", encoding="utf-8")
+    pool = PreprocessPool(args.workers, stop_words, args.tokenizer) if args.workers != 1 else None
+    cache = ResultCache(args.cache_size, args.cache) if args.cache_size > 0 else None
+    total = spam = 0
+    start = time.perf_counter()
+    try:
+        writer = _Writer(stream, out_fmt, explain=args.explain, headers=in_fmt in EMAIL_FORMATS)
+        for rows in score_messages(
+            messages, tfidf, model, stop_words,
+            chunk_size=args.chunk_size,
+            threshold=args.threshold,
+            tokenizer=args.tokenizer,
+            explain=args.explain,
+            pool=pool,
+            cache=cache,
+            cache_namespace=f"{args.model}:{model_version(args.model)}:{args.tokenizer}",
+        ):
+            total += len(rows)
+            spam += sum(r["prediction"] for r in rows)
+            writer.write(rows)
+            logger.info("Scored %d messages", total)
+    finally:
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            logger.info("Result cache: %s", cache.stats())
+            cache.close()
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Done: %d messages (%d spam) in %.2fs (%.0f msg/s)",
+        total, spam, elapsed, total / elapsed if elapsed else 0.0,
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Spam detector command-line tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    score = sub.add_parser("score", help="Score a corpus of messages in bulk")
+    score.add_argument("input", type=Path, help="CSV, JSONL or mbox ('-' for stdin), .eml directory or Maildir")
+    score.add_argument("-o", "--output", help="Output file (.csv or .jsonl); default stdout")
+    score.add_argument("--format", choices=INPUT_FORMATS, help="Input format (default: from path)")
+    score.add_argument("--output-format", choices=OUTPUT_FORMATS, help="Output format (default: from -o suffix)")
+    score.add_argument("--text-column", help="CSV column / JSON key holding the message text")
+    score.add_argument("--id-column", help="CSV column / JSON key holding a message id")
+    score.add_argument("--encoding", default="utf-8", help="Input text encoding for CSV/JSONL")
+    score.add_argument("--model", default="default", help="Model name passed to load_model")
+    score.add_argument("--chunk-size", type=int, default=1000, help="Messages scored per batch")
+    score.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="Spam probability above which a message is labelled spam")
+    score.add_argument("--tokenizer", choices=TOKENIZERS, default="nltk")
+    score.add_argument("--explain", action="store_true", help="Include top spam/ham words per message")
+    score.add_argument("--workers", type=int, default=1,
+                       help="Preprocessing processes (0 = one per CPU); chunks below "
+                            f"{PARALLEL_MIN_BATCH:,} messages stay in-process")
+    score.add_argument("--cache", metavar="PATH", help="sqlite result cache reused across runs")
+    score.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                       help="Results kept in memory for repeated messages (0 disables caching)")
+    score.set_defaults(func=_cmd_score)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = build_parser().parse_args(argv)
+    if getattr(args, "chunk_size", 1) < 1:
+        logger.error("--chunk-size must be >= 1")
+        return 2
+    try:
+        return args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
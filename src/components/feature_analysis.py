@@ -3,7 +3,8 @@ Advanced feature analysis UI: displays extracted text, formatting, URL, and beha
 """
 import streamlit as st
 import html
-from typing import Set, List
+from typing import Set, List, Optional
+from src.context import MessageContext
 from src.features import extract_all_features
 from src.design import section_heading_html
 
@@ -40,13 +41,19 @@ def render_advanced_feature_analysis(
     processed_words: List[str],
     spam_words_set: Set[str],
     ham_words_set: Set[str],
+    context: Optional[MessageContext] = None,
 ):
-    """Render the Advanced Feature Analysis section with all extractable features."""
+    """Render the Advanced Feature Analysis section with all extractable features.
+
+    context (a MessageContext) supplies precomputed statistics and URLs.
+    """
     feats = extract_all_features(
         raw_text,
         processed_words=processed_words,
         spam_words_set=spam_words_set,
         ham_words_set=ham_words_set,
+        stats=context.stats if context else None,
+        urls=context.urls if context else None,
     )
 
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -3,15 +3,29 @@ import html
 import re
 from src.visualization import annotated_message_html
 from src.design import section_heading_html
+from src.features import text_stats
+from src.patterns import HAM_PATTERNS, SPAM_PATTERNS, find_keywords, pattern_flags
 
+URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+NUMBER_RE = re.compile(r'\d+')
 
-def render_pattern_analysis(input_sms, result, confidence, spam_prob, ham_prob, words, spam_words_set, ham_words_set):
-    """Render detailed pattern analysis section."""
+
+def render_pattern_analysis(input_sms, result, confidence, spam_prob, ham_prob, words, spam_words_set, ham_words_set,
+                            context=None):
+    """Render detailed pattern analysis section.
+
+    context is the message's MessageContext, whose statistics, URLs and
+    tokens are reused instead of recomputed.
+    """
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown(section_heading_html("🔍", "Detailed Pattern Analysis"), unsafe_allow_html=True)
     
     # Extract patterns
-    patterns_data = extract_patterns(input_sms, words, spam_words_set, ham_words_set)
+    patterns_data = extract_patterns(
+        input_sms, words, spam_words_set, ham_words_set,
+        stats=context.stats if context else None,
+        urls=context.urls if context else None,
+    )
     
     # Render two-column analysis
     render_indicators_comparison(patterns_data)
@@ -20,41 +34,34 @@ def render_pattern_analysis(input_sms, result, confidence, spam_prob, ham_prob,
     render_classification_summary(result, confidence, spam_prob, ham_prob, patterns_data)
     
     # Annotated message
-    render_annotated_message(input_sms, spam_words_set, ham_words_set)
+    render_annotated_message(
+        input_sms, spam_words_set, ham_words_set,
+        tokens=context.display_tokens if context else None,
+    )
 
 
-def extract_patterns(input_sms, words, spam_words_set, ham_words_set):
-    """Extract all patterns and indicators from the message."""
-    char_count = len(input_sms)
+def extract_patterns(input_sms, words, spam_words_set, ham_words_set, stats=None, urls=None):
+    """Extract all patterns and indicators from the message.
+
+    stats (TextStats) and urls are reused when the caller already has them.
+    """
+    stats = stats or text_stats(input_sms)
+    char_count = stats.length
     
     # URL and character analysis
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    urls = re.findall(url_pattern, input_sms)
+    if urls is None:
+        urls = URL_RE.findall(input_sms)
     url_count = len(urls)
-    numbers = re.findall(r'\d+', input_sms)
+    numbers = NUMBER_RE.findall(input_sms)
     number_count = len(numbers)
-    exclamation_count = input_sms.count('!')
-    uppercase_count = sum(1 for c in input_sms if c.isupper())
+    exclamation_count = stats.exclamations
+    uppercase_count = stats.uppercase
     uppercase_ratio = uppercase_count / char_count if char_count > 0 else 0
     
-    # Spam patterns
-    spam_patterns = {
-        'Free/Freebie': bool(re.search(r'\bfree\b', input_sms, re.IGNORECASE)),
-        'Win/Prize': bool(re.search(r'\b(win|won|prize|award)\b', input_sms, re.IGNORECASE)),
-        'Urgent': bool(re.search(r'\burgent\b', input_sms, re.IGNORECASE)),
-        'Click Here': bool(re.search(r'\bclick\b', input_sms, re.IGNORECASE)),
-        'Limited Time': bool(re.search(r'\b(limited|time|offer|expire)\b', input_sms, re.IGNORECASE)),
-        'Money/Cash': bool(re.search(r'\b(money|cash|dollar|£|€|$)\b', input_sms, re.IGNORECASE)),
-        'Congratulations': bool(re.search(r'\bcongrat\b', input_sms, re.IGNORECASE)),
-    }
-    
-    # Ham patterns
-    ham_patterns = {
-        'Personal Greeting': bool(re.search(r'\b(hi|hello|hey|dear|thanks|thank you)\b', input_sms, re.IGNORECASE)),
-        'Personal Pronouns': bool(re.search(r'\b(i|you|we|they|me|us)\b', input_sms, re.IGNORECASE)),
-        'Question Words': bool(re.search(r'\b(what|when|where|why|how|who)\b', input_sms, re.IGNORECASE)),
-        'Casual Language': bool(re.search(r'\b(ok|yeah|sure|maybe|probably)\b', input_sms, re.IGNORECASE)),
-    }
+    # Spam and ham patterns, from one keyword scan
+    hits = find_keywords(input_sms)
+    spam_patterns = pattern_flags(SPAM_PATTERNS, hits)
+    ham_patterns = pattern_flags(HAM_PATTERNS, hits)
     
     # Find words
     message_words_lower = [w.lower() for w in words]
@@ -256,7 +263,7 @@ def render_ham_summary(confidence, spam_prob, ham_prob, data):
     st.markdown("</ul>", unsafe_allow_html=True)
 
 
-def render_annotated_message(input_sms, spam_words_set, ham_words_set):
+def render_annotated_message(input_sms, spam_words_set, ham_words_set, tokens=None):
     """Render annotated message with highlighted words."""
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown("""
@@ -269,5 +276,5 @@ def render_annotated_message(input_sms, spam_words_set, ham_words_set):
         </p>
     """, unsafe_allow_html=True)
     
-    annotated_html = annotated_message_html(input_sms, spam_words=spam_words_set, ham_words=ham_words_set)
+    annotated_html = annotated_message_html(input_sms, spam_words=spam_words_set, ham_words=ham_words_set, tokens=tokens)
     st.markdown(annotated_html, unsafe_allow_html=True)
\ No newline at end of file
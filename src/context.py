@@ -0,0 +1,127 @@
+"""
+Per-message analysis context.
+
+Analysing one message used to preprocess, vectorize, tokenize and scan the
+text separately in every panel. MessageContext does each of those steps
+once (stemmed words, the TF-IDF row, probabilities, character statistics,
+keyword hits, URLs, display tokens and sentence count) and is handed to
+every renderer and feature extractor. to_dict() gives the same analysis
+as plain JSON-serializable data.
+"""
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.features import TextStats, extract_urls, text_stats
+from src.model import DEFAULT_THRESHOLD, explain_vector, score_vectors, vectorize_tokens
+from src.nlp import preprocess_tokens
+from src.patterns import find_keywords
+
+LABELS = {0: "ham", 1: "spam"}
+
+# Words, punctuation runs and whitespace, as shown in the annotated message
+DISPLAY_TOKEN_RE = re.compile(r"\w+|[^\w\s]+|\s+")
+
+
+def _sentence_count(text: str) -> int:
+    try:
+        import nltk
+        return len(nltk.sent_tokenize(text))
+    except LookupError:
+        return max(1, text.count('.') + text.count('!') + text.count('?'))
+
+
+class MessageContext:
+    """Everything derived from one message, computed once.
+
+    Build with MessageContext.build(text, tfidf, model, ...). Explanations
+    are computed lazily from the stored TF-IDF row and cached per top_k.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        transformed: str,
+        vector,
+        probabilities: np.ndarray,
+        threshold: float,
+        tfidf=None,
+        model=None,
+        words: Optional[List[str]] = None,
+    ):
+        self.text = text
+        self.transformed = transformed
+        self.words: List[str] = words if words is not None else transformed.split()
+        self.vector = vector
+        self.probabilities = probabilities
+        self.threshold = threshold
+        self.prediction = int(probabilities[1] > threshold)
+        self.stats: TextStats = text_stats(text)
+        self.keywords: FrozenSet[str] = find_keywords(text)
+        self.urls: List[str] = extract_urls(text)
+        self.display_tokens: List[str] = DISPLAY_TOKEN_RE.findall(text)
+        self.word_count = len(text.split())
+        self.sentence_count = _sentence_count(text)
+        self._tfidf = tfidf
+        self._model = model
+        self._explanations: Dict[int, Dict[str, List[Tuple[str, float]]]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        text: str,
+        tfidf,
+        model,
+        stop_words: Optional[Set[str]] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        tokenizer: str = "nltk",
+    ) -> "MessageContext":
+        """Preprocess, vectorize and score text once."""
+        words = preprocess_tokens(text, stop_words=stop_words, tokenizer=tokenizer)
+        vector = vectorize_tokens([words], tfidf)
+        _, probas = score_vectors(vector, model, threshold)
+        return cls(text, " ".join(words), vector, probas[0], threshold, tfidf=tfidf, model=model, words=words)
+
+    @property
+    def spam_probability(self) -> float:
+        return float(self.probabilities[1])
+
+    @property
+    def ham_probability(self) -> float:
+        return float(self.probabilities[0])
+
+    @property
+    def confidence(self) -> float:
+        return float(self.probabilities[self.prediction])
+
+    @property
+    def label(self) -> str:
+        return LABELS[self.prediction]
+
+    def explanation(self, top_k: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        """Word impact explanation from the stored TF-IDF row."""
+        if top_k not in self._explanations:
+            if self._tfidf is None or self._model is None:
+                return {"positive": [], "negative": []}
+            self._explanations[top_k] = explain_vector(self.vector, self._tfidf, self._model, top_k)
+        return self._explanations[top_k]
+
+    def to_dict(self, explain_top_k: Optional[int] = None) -> Dict[str, Any]:
+        """JSON-serializable analysis (explanation included when explain_top_k is set)."""
+        out: Dict[str, Any] = {
+            "label": self.label,
+            "prediction": self.prediction,
+            "probabilities": {"ham": self.ham_probability, "spam": self.spam_probability},
+            "confidence": self.confidence,
+            "threshold": self.threshold,
+            "transformed_text": self.transformed,
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+            "urls": self.urls,
+            "keywords": sorted(self.keywords),
+            "stats": self.stats._asdict(),
+        }
+        if explain_top_k:
+            out["explanation"] = self.explanation(explain_top_k)
+        return out
@@ -0,0 +1,294 @@
+"""
+Preprocessed-corpus cache.
+
+transformed_text is the slowest step of training and evaluation, and its
+output only changes when the preprocessing does. CorpusCache stores it per
+message, keyed by a hash of the raw text, under a fingerprint of everything
+that determines the output: the source of src/nlp.py, the stop word set,
+the tokenizer and the NLTK/stemmer version. Changing any of them starts a
+new, empty cache; within one fingerprint only messages not seen before are
+preprocessed.
+
+    Data/preprocessed/cache/{fingerprint[:16]}/
+      manifest.json   fingerprint inputs and entry count
+      index.npy       per entry: 16-byte text hash, end offset in texts.bin
+      texts.bin       concatenated UTF-8 transformed texts
+      .lock           held by a writer while it flushes
+
+    python -m src.corpus build               # fill the cache from spam.csv
+    python -m src.corpus check Data/preprocessed/transform_data.csv
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Union
+
+import numpy as np
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from src import nlp
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+INDEX_DTYPE = np.dtype([("key", "u1", (16,)), ("end", "<i8")])
+
+
+def default_cache_root() -> Path:
+    """Default cache location (Data/preprocessed/cache)."""
+    return Path(__file__).resolve().parent.parent / "Data" / "preprocessed" / "cache"
+
+
+def preprocessing_fingerprint(stop_words: Set[str], tokenizer: str = "nltk") -> str:
+    """Hash of everything transformed_text's output depends on."""
+    h = hashlib.sha256()
+    h.update(Path(nlp.__file__).read_bytes())
+    h.update(f"\0tokenizer={tokenizer}\0nltk={nlp.nltk.__version__}\0stemmer={nlp.ps.mode}\0".encode())
+    h.update("\n".join(sorted(stop_words)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def text_key(text: str) -> bytes:
+    """16-byte key of a raw message."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _replace_atomically(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on path across processes (blocks until free)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CorpusCache:
+    """transformed_text results for one preprocessing fingerprint.
+
+    transform() returns cached results and preprocesses only the misses;
+    new results are kept in memory until flush(). Writes append to
+    texts.bin and then atomically replace the index, so a crash or a
+    concurrent reader only ever sees a complete earlier state. Writers in
+    different processes take turns under a lock file and each appends
+    after the index the previous one wrote.
+    """
+
+    def __init__(
+        self,
+        stop_words: Optional[Set[str]] = None,
+        tokenizer: str = "nltk",
+        root: Optional[Union[str, Path]] = None,
+    ):
+        self.stop_words = stop_words if stop_words is not None else nlp.get_stopwords()
+        self.tokenizer = tokenizer
+        self.fingerprint = preprocessing_fingerprint(self.stop_words, tokenizer)
+        self.path = Path(root or default_cache_root()) / self.fingerprint[:16]
+        self._index: Dict[bytes, int] = {}
+        self._entries = np.zeros(0, dtype=INDEX_DTYPE)
+        self._texts = b""
+        self._pending: Dict[bytes, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Replace the in-memory index with the one on disk (empty if none)."""
+        self._index = {}
+        self._entries = np.zeros(0, dtype=INDEX_DTYPE)
+        self._texts = b""
+        manifest_path = self.path / MANIFEST
+        if not manifest_path.is_file():
+            return
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION or manifest.get("fingerprint") != self.fingerprint:
+            logger.warning("Ignoring corpus cache %s: written by a different format or preprocessing", self.path)
+            return
+        self._entries = np.load(self.path / "index.npy", allow_pickle=False)
+        size = int(self._entries["end"][-1]) if len(self._entries) else 0
+        self._texts = (self.path / "texts.bin").read_bytes()[:size]
+        self._index = {k.tobytes(): i for i, k in enumerate(self._entries["key"])}
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._pending)
+
+    def _get(self, key: bytes) -> Optional[str]:
+        i = self._index.get(key)
+        if i is None:
+            return self._pending.get(key)
+        ends = self._entries["end"]
+        start = int(ends[i - 1]) if i else 0
+        return self._texts[start:int(ends[i])].decode("utf-8")
+
+    def transform(self, texts: Sequence[str], pool: Optional[nlp.PreprocessPool] = None) -> List[str]:
+        """transformed_text for every message, preprocessing only cache misses.
+
+        pool, when given, must use this cache's stop words and tokenizer.
+        """
+        keys = [text_key(t) for t in texts]
+        out: List[Optional[str]] = [self._get(k) for k in keys]
+        missing: Dict[bytes, int] = {}
+        for i, (key, value) in enumerate(zip(keys, out)):
+            if value is None:
+                missing.setdefault(key, i)
+        self.hits += len(out) - sum(v is None for v in out)
+        self.misses += len(missing)
+        if missing:
+            batch = [texts[i] for i in missing.values()]
+            if pool is not None:
+                fresh = pool.transform(batch)
+            else:
+                fresh = [nlp.transformed_text(t, stop_words=self.stop_words, tokenizer=self.tokenizer) for t in batch]
+            self._pending.update(zip(missing, fresh))
+            out = [self._pending[k] if v is None else v for k, v in zip(keys, out)]
+        return out
+
+    def flush(self) -> int:
+        """Write pending results to disk. Returns the number written."""
+        if not self._pending:
+            return 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        with _exclusive_lock(self.path / LOCK_FILE):
+            # Another process may have flushed since this cache was loaded
+            self._load()
+            pending = {k: v for k, v in self._pending.items() if k not in self._index}
+            if pending:
+                self._append(pending)
+        written = len(pending)
+        self._pending.clear()
+        return written
+
+    def _append(self, pending: Dict[bytes, str]):
+        """Append entries after the on-disk index; caller holds the lock."""
+        encoded = [v.encode("utf-8") for v in pending.values()]
+        base = len(self._texts)
+        added = np.empty(len(encoded), dtype=INDEX_DTYPE)
+        added["key"] = np.frombuffer(b"".join(pending), dtype=np.uint8).reshape(-1, 16)
+        added["end"] = base + np.cumsum([len(b) for b in encoded])
+        blob = b"".join(encoded)
+        with open(self.path / "texts.bin", "ab") as f:
+            f.truncate(base)  # drop bytes of an earlier interrupted write
+            f.write(blob)
+        index = np.concatenate([self._entries, added])
+        buf = io.BytesIO()
+        np.save(buf, index, allow_pickle=False)
+        _replace_atomically(self.path / "index.npy", buf.getvalue())
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "tokenizer": self.tokenizer,
+            "nltk_version": nlp.nltk.__version__,
+            "stop_words": len(self.stop_words),
+            "entries": len(index),
+        }
+        _replace_atomically(self.path / MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+
+        for i, key in enumerate(pending, len(self._entries)):
+            self._index[key] = i
+        self._texts += blob
+        self._entries = index
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def check_preprocessed_csv(
+    path: Union[str, Path],
+    cache: CorpusCache,
+    text_column: str = "text",
+    transformed_column: str = "transformed_text",
+    show: int = 5,
+) -> Dict[str, object]:
+    """Compare a stored text -> transformed_text CSV with current preprocessing."""
+    texts: List[str] = []
+    stored: List[str] = []
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.DictReader(f):
+            texts.append(row[text_column] or "")
+            stored.append(row[transformed_column] or "")
+    current = cache.transform(texts)
+    mismatches = [i for i, (a, b) in enumerate(zip(stored, current)) if a != b]
+    return {
+        "rows": len(texts),
+        "mismatches": len(mismatches),
+        "examples": [
+            {"row": i + 2, "stored": stored[i], "current": current[i]} for i in mismatches[:show]
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.corpus", description="Preprocessed-corpus cache.")
+    parser.add_argument("--tokenizer", choices=nlp.TOKENIZERS, default="nltk")
+    parser.add_argument("--cache-dir", type=Path, help="Cache root (default: Data/preprocessed/cache)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Preprocess a labelled CSV into the cache")
+    build.add_argument("--data", type=Path, help="CSV to preprocess (default: Data/raw/spam.csv)")
+    build.add_argument("--text-column", default="v2")
+    build.add_argument("--encoding", default="cp1252")
+    build.add_argument("--workers", type=int, default=1, help="Preprocessing processes (0 = one per CPU)")
+    check = sub.add_parser("check", help="Report rows of a preprocessed CSV that current preprocessing changes")
+    check.add_argument("path", type=Path)
+    check.add_argument("--text-column", default="text")
+    check.add_argument("--transformed-column", default="transformed_text")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        nlp.setup_nltk(punkt=args.tokenizer == "nltk")
+        cache = CorpusCache(tokenizer=args.tokenizer, root=args.cache_dir)
+        if args.command == "build":
+            from src.ingest import chunked, iter_csv
+            from src.train import DEFAULT_DATA
+
+            with nlp.PreprocessPool(args.workers, cache.stop_words, args.tokenizer) as pool:
+                messages = iter_csv(args.data or DEFAULT_DATA, text_column=args.text_column, encoding=args.encoding)
+                for chunk in chunked(messages, 5000):
+                    cache.transform([m["text"] for m in chunk], pool)
+            logger.info("Added %d entries to %s (%s)", cache.flush(), cache.path, cache.stats())
+        else:
+            report = check_preprocessed_csv(args.path, cache, args.text_column, args.transformed_column)
+            cache.flush()
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return 1 if report["mismatches"] else 0
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
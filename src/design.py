@@ -2,7 +2,8 @@ import streamlit as st
 import base64
 import html
 from pathlib import Path
-from typing import Optional, Iterable, Dict
+from functools import lru_cache
+from typing import Any, Optional, Iterable, Dict, Tuple
 import time
 
 
@@ -17,22 +18,18 @@ def setup_page(
 ):
     """
     Configure the Streamlit page with premium design and advanced animations.
-    """
-    logo_base64 = ""
-    page_icon = "🛡️"
 
+    The logo and generated CSS are memoized, so Streamlit reruns only pay
+    for the set_page_config and markdown calls.
+    """
+    logo_base64, page_icon = "", "🛡️"
     if logo_path and logo_path.exists():
         try:
-            with open(logo_path, "rb") as f:
-                logo_base64 = base64.b64encode(f.read()).decode()
-            try:
-                from PIL import Image
-                page_icon = Image.open(logo_path)
-            except Exception:
-                page_icon = "🛡️"
+            logo_base64, logo_image = _load_logo(str(logo_path), logo_path.stat().st_mtime_ns)
+            if logo_image is not None:
+                page_icon = logo_image
         except Exception:
             logo_base64 = ""
-            page_icon = "🛡️"
 
     st.set_page_config(
         page_title=title,
@@ -45,6 +42,21 @@ def setup_page(
     st.markdown(get_css(logo_base64, animations=animations, compact=compact), unsafe_allow_html=True)
 
 
+@lru_cache(maxsize=4)
+def _load_logo(logo_path: str, mtime_ns: int) -> Tuple[str, Any]:
+    """Base64 text and decoded PIL image of the logo, cached per file version."""
+    with open(logo_path, "rb") as f:
+        logo_base64 = base64.b64encode(f.read()).decode()
+    try:
+        from PIL import Image
+        image = Image.open(logo_path)
+        image.load()  # read the pixels now so no file handle stays open
+    except Exception:
+        image = None
+    return logo_base64, image
+
+
+@lru_cache(maxsize=8)
 def get_css(logo_base64: str, animations: bool = True, compact: bool = False) -> str:
     """
     Premium CSS with glassmorphism, advanced gradients, and sophisticated animations.
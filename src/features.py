@@ -6,7 +6,11 @@ Sender/header features (SPF, DKIM, domain reputation) require full email headers
 import re
 import math
 from collections import Counter
-from typing import Dict, Any, List, Set, Optional
+from typing import Dict, Any, List, NamedTuple, Set, Optional
+
+import numpy as np
+
+from src.patterns import IMPERATIVE_VERBS, URGENCY_WORDS, find_keywords
 
 # Common URL shorteners and suspicious patterns
 URL_SHORTENERS = {
@@ -15,40 +19,91 @@ URL_SHORTENERS = {
     "q.gs", "po.st", "bc.vc", "twitthis.com", "u.to", "j.mp", "buzurl.com",
     "cutt.ly", "short.io", "rebrand.ly", "bl.ink", "short.link",
 }
-IMPERATIVE_VERBS = {
-    "click", "buy", "claim", "order", "register", "subscribe", "act", "call",
-    "reply", "send", "verify", "confirm", "update", "unsubscribe", "open",
-}
-URGENCY_WORDS = {
-    "urgent", "immediately", "asap", "now", "limited", "hurry", "expire",
-    "expires", "deadline", "last chance", "act now", "don't wait", "limited time",
-    "only today", "final notice", "instant", "quick", "rush", "emergency",
-}
+URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+', re.IGNORECASE)
+IP_URL_RE = re.compile(r"https?://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}")
+WORD_RE = re.compile(r"\b\w+\b")
+ALL_CAPS_RE = re.compile(r"\b[A-Z]+\b")
+HTML_TAG_RE = re.compile(r"<[a-zA-Z][^>]*>")
+HIDDEN_STYLE_RE = re.compile(r"style\s*=\s*[^>]*(display:\s*none|color:\s*#?[fF]{6})", re.I)
+WHITE_COLOR_RE = re.compile(r"color\s*:\s*#?[fF]{6}", re.I)
 
 
-def _extract_urls(text: str) -> List[str]:
+def extract_urls(text: str) -> List[str]:
     """Extract URLs from text."""
-    pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    return re.findall(pattern, text, re.IGNORECASE)
-
-
-def _char_ngrams(text: str, n: int = 3) -> Counter:
-    """Character n-grams (e.g. n=3 for trigrams)."""
-    text = text.lower().replace(" ", "")
-    if len(text) < n:
-        return Counter()
-    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
-
-
-def _text_entropy(text: str) -> float:
-    """Shannon entropy of character distribution (0 = predictable, higher = more random)."""
-    if not text:
-        return 0.0
-    counter = Counter(text.lower())
-    total = len(text)
-    return -sum(
-        (c / total) * math.log2(c / total)
-        for c in counter.values()
+    return URL_RE.findall(text)
+
+
+class TextStats(NamedTuple):
+    """Character-level statistics of a message, computed once by text_stats."""
+    length: int
+    letters: int          # str.isalpha
+    uppercase: int        # str.isupper
+    digits: int           # str.isdigit
+    whitespace: int       # str.isspace
+    special: int          # neither alphanumeric nor whitespace
+    spaces: int           # ASCII spaces only
+    symbols: int          # any of SPECIAL_SYMBOLS
+    exclamations: int
+    questions: int
+    entropy: float        # Shannon entropy (bits) of the lowercased characters
+    trigram_unique: int   # distinct character trigrams, lowercased, spaces removed
+    trigram_total: int
+
+
+SPECIAL_SYMBOLS = "$@#%&*"
+
+
+def text_stats(text: str) -> TextStats:
+    """Compute every character-class count, entropy and trigram count for text.
+
+    The text is counted once (Counter runs in C) and the class tests run per
+    distinct character rather than per character. Trigrams are counted on a
+    NumPy view of the UTF-32 code points, packed three to a uint64.
+    """
+    counts = Counter(text)
+    letters = uppercase = digits = whitespace = special = 0
+    lower_counts: Counter = Counter()
+    for ch, n in counts.items():
+        if ch.isalpha():
+            letters += n
+        if ch.isupper():
+            uppercase += n
+        if ch.isdigit():
+            digits += n
+        if ch.isspace():
+            whitespace += n
+        elif not ch.isalnum():
+            special += n
+        for lc in ch.lower():
+            lower_counts[lc] += n
+
+    length = len(text)
+    entropy = 0.0
+    if length:
+        entropy = -sum((c / length) * math.log2(c / length) for c in lower_counts.values())
+
+    stripped = text.lower().replace(" ", "")
+    trigram_unique = trigram_total = 0
+    if len(stripped) >= 3:
+        cp = np.frombuffer(stripped.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.uint64)
+        keys = (cp[:-2] << np.uint64(42)) | (cp[1:-1] << np.uint64(21)) | cp[2:]
+        trigram_unique = int(np.unique(keys).size)
+        trigram_total = int(keys.size)
+
+    return TextStats(
+        length=length,
+        letters=letters,
+        uppercase=uppercase,
+        digits=digits,
+        whitespace=whitespace,
+        special=special,
+        spaces=counts[" "],
+        symbols=sum(counts[c] for c in SPECIAL_SYMBOLS),
+        exclamations=counts["!"],
+        questions=counts["?"],
+        entropy=entropy,
+        trigram_unique=trigram_unique,
+        trigram_total=trigram_total,
     )
 
 
@@ -57,15 +112,20 @@ def extract_all_features(
     processed_words: Optional[List[str]] = None,
     spam_words_set: Optional[Set[str]] = None,
     ham_words_set: Optional[Set[str]] = None,
+    stats: Optional[TextStats] = None,
+    urls: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
     Extract all available features from raw message text.
     processed_words: tokenized/stemmed words (e.g. from transformed_text).
     spam_words_set / ham_words_set: known spam/ham word sets for keyword features.
+    stats / urls: text_stats(raw_text) and extract_urls(raw_text), if the
+    caller has already computed them (e.g. a MessageContext).
     """
+    stats = stats or text_stats(raw_text)
     spam_words_set = spam_words_set or set()
     ham_words_set = ham_words_set or set()
-    words = processed_words or [w for w in re.findall(r"\b\w+\b", raw_text) if w]
+    words = processed_words or [w for w in WORD_RE.findall(raw_text) if w]
     word_count = len(words)
     char_count = len(raw_text)
     unique_words = set(w.lower() for w in words)
@@ -77,22 +137,20 @@ def extract_all_features(
     avg_word_length = sum(word_lengths) / len(word_lengths) if word_lengths else 0
 
     # Character n-grams (count of unique trigrams as a simple measure)
-    char_trigrams = _char_ngrams(raw_text, 3)
-    char_ngram_count = len(char_trigrams)
-    char_ngram_total = sum(char_trigrams.values())
+    char_ngram_count = stats.trigram_unique
+    char_ngram_total = stats.trigram_total
 
     # ---- 2. Formatting & style features ----
-    letters = [c for c in raw_text if c.isalpha()]
-    alpha_count = len(letters)
-    upper_count = sum(1 for c in raw_text if c.isupper())
-    capital_ratio = upper_count / alpha_count if alpha_count else 0
-    exclamation_count = raw_text.count("!")
-    question_count = raw_text.count("?")
-    special_chars = sum(1 for c in raw_text if c in "$@#%&*")
-    all_caps_words = sum(1 for w in re.findall(r"\b[A-Z]+\b", raw_text) if len(w) > 1)
+    alpha_count = stats.letters
+    capital_ratio = stats.uppercase / alpha_count if alpha_count else 0
+    exclamation_count = stats.exclamations
+    question_count = stats.questions
+    special_chars = stats.symbols
+    all_caps_words = sum(1 for w in ALL_CAPS_RE.findall(raw_text) if len(w) > 1)
 
     # ---- 3. URL & link features ----
-    urls = _extract_urls(raw_text)
+    if urls is None:
+        urls = extract_urls(raw_text)
     url_count = len(urls)
     url_shortener_count = 0
     suspicious_ip_url_count = 0
@@ -102,7 +160,7 @@ def extract_all_features(
         lower = u.lower()
         if any(short in lower for short in URL_SHORTENERS):
             url_shortener_count += 1
-        if re.search(r"https?://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}", u):
+        if IP_URL_RE.search(u):
             suspicious_ip_url_count += 1
         if lower.startswith("https://"):
             https_count += 1
@@ -110,11 +168,11 @@ def extract_all_features(
             http_count += 1
 
     # ---- 4. Structural features (from pasted text we only have "body") ----
-    html_tags = bool(re.search(r"<[a-zA-Z][^>]*>", raw_text))
+    html_tags = bool(HTML_TAG_RE.search(raw_text))
     # Simple heuristic: colored/hidden text often in style= or color=
     hidden_or_colored = bool(
-        re.search(r"style\s*=\s*[^>]*(display:\s*none|color:\s*#?[fF]{6})", raw_text, re.I)
-        or re.search(r"color\s*:\s*#?[fF]{6}", raw_text, re.I)
+        HIDDEN_STYLE_RE.search(raw_text)
+        or WHITE_COLOR_RE.search(raw_text)
     )
 
     # ---- 5. Sender & header features ----
@@ -125,7 +183,7 @@ def extract_all_features(
     spf_dkim_dmarc_status = None  # N/A
 
     # ---- 6. Statistical features ----
-    entropy = _text_entropy(raw_text)
+    entropy = stats.entropy
     total_word_occurrences = len(words)
     repeated_word_ratio = (
         1 - len(unique_words) / total_word_occurrences
@@ -133,9 +191,9 @@ def extract_all_features(
     )
 
     # ---- 7. Behavioral indicators ----
-    text_lower = raw_text.lower()
-    imperative_count = sum(1 for v in IMPERATIVE_VERBS if re.search(r"\b" + re.escape(v) + r"\b", text_lower))
-    urgency_count = sum(1 for u in URGENCY_WORDS if re.search(r"\b" + re.escape(u) + r"\b", text_lower))
+    hits = find_keywords(raw_text)
+    imperative_count = len(hits & IMPERATIVE_VERBS)
+    urgency_count = len(hits & URGENCY_WORDS)
 
     return {
         # 1. Text content
@@ -0,0 +1,308 @@
+"""
+Incremental model updates from analyst feedback.
+
+Analysts label messages (via POST /feedback or `python -m src.feedback add`)
+and the labels are appended to a JSON Lines feedback log. `apply` replays
+the log from where the last checkpoint stopped, folds it into a live copy
+of the model with MultinomialNB.partial_fit in small batches, and writes a
+new versioned checkpoint:
+
+    Models/model_{base}-v{n}.pkl        updated classifier
+    Models/vectorizer_{base}-v{n}.pkl   vectorizer (TF-IDF: as trained;
+                                        hashing: updated document frequencies)
+    Models/model_{base}-v{n}.json       parent, feedback offset, record counts
+
+Checkpoints load like any other model (load_model("default-v3")). With
+--publish NAME the newest checkpoint's vectorizer and classifier are also
+written as model NAME, so a server started with --model NAME hot-swaps to
+it. save_model completes a publish by writing the pair's checksums last,
+so a server never loads one checkpoint's vectorizer with another's
+classifier (hashing models change both on every apply).
+
+    python -m src.feedback add --label spam "WIN a FREE prize, reply now"
+    python -m src.feedback apply --model default --publish online --watch 60
+
+With a TfidfVectorizer, partial_fit only updates per-class term counts:
+the vocabulary and IDF weights stay as trained, so words outside the
+vocabulary still need a full retrain. Hashing models (src.hashing) also
+update their document frequencies and learn new words incrementally.
+"""
+import argparse
+import copy
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from src.ingest import chunked
+from src.model import list_available_models, load_model, model_metadata_path, save_model
+from src.nlp import TOKENIZERS, get_stopwords, setup_nltk, transformed_text
+
+logger = logging.getLogger(__name__)
+
+LABEL_VALUES = {"ham": 0, "spam": 1}
+DEFAULT_BATCH_SIZE = 64
+
+
+def default_feedback_path() -> Path:
+    """Default feedback log location (Data/feedback/feedback.jsonl)."""
+    return Path(__file__).resolve().parent.parent / "Data" / "feedback" / "feedback.jsonl"
+
+
+def parse_label(label: Any) -> int:
+    """Normalize "spam"/"ham"/1/0 (or "1"/"0") to 1/0; raises ValueError otherwise."""
+    if isinstance(label, str):
+        key = label.strip().lower()
+        if key in LABEL_VALUES:
+            return LABEL_VALUES[key]
+        if key in ("0", "1"):
+            return int(key)
+    if not isinstance(label, bool) and label in (0, 1):
+        return int(label)
+    raise ValueError(f"Label must be 'spam', 'ham', 1 or 0; got {label!r}")
+
+
+class FeedbackStore:
+    """Append-only JSON Lines log of labelled messages.
+
+    Records are addressed by byte offset, so a reader can resume exactly
+    where a checkpoint stopped. Appends are serialized within a process
+    and written as single lines, so readers never consume a partial record.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else default_feedback_path()
+        self._lock = threading.Lock()
+
+    def add(self, text: str, label: Any, source: Optional[str] = None) -> Dict[str, Any]:
+        """Append one labelled message and return the stored record."""
+        record = {
+            "text": text,
+            "label": parse_label(label),
+            "source": source,
+            "received_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return record
+
+    def read(self, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (offset after the record, record) from a byte offset on."""
+        if not self.path.is_file():
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # record still being written
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    record["label"] = parse_label(record.get("label"))
+                except ValueError as e:
+                    logger.warning("Skipping bad feedback record at byte %d: %s", offset - len(line), e)
+                    continue
+                yield offset, record
+
+
+class OnlineTrainer:
+    """Fold labelled messages into a live copy of a model with partial_fit.
+
+    Each update() fits a copy of the current model (and of the vectorizer,
+    when it supports partial_fit) and swaps it in, so self.tfidf and
+    self.model can be read from other threads while an update runs.
+    """
+
+    def __init__(self, tfidf, model, stop_words: Optional[Set[str]] = None, tokenizer: str = "nltk"):
+        if not hasattr(model, "partial_fit"):
+            raise ValueError(f"{type(model).__name__} does not support incremental updates (no partial_fit)")
+        if list(getattr(model, "classes_", [])) != [0, 1]:
+            raise ValueError("Model must be a fitted ham (0) / spam (1) classifier")
+        self.tfidf = tfidf
+        self.model = copy.deepcopy(model)
+        self.stop_words = stop_words
+        self.tokenizer = tokenizer
+        self.updates = 0
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def update(self, texts: Sequence[str], labels: Sequence[int]):
+        """Apply one batch of raw messages and their 0/1 labels."""
+        if not texts:
+            return
+        transformed = [transformed_text(t, stop_words=self.stop_words, tokenizer=self.tokenizer) for t in texts]
+        with self._lock:
+            tfidf = self.tfidf
+            if hasattr(tfidf, "partial_fit"):
+                tfidf = copy.deepcopy(tfidf)
+                tfidf.partial_fit(transformed)
+            live = copy.deepcopy(self.model)
+            live.partial_fit(tfidf.transform(transformed), list(labels))
+            self.tfidf, self.model = tfidf, live
+            self.updates += 1
+            self.records += len(texts)
+
+    def snapshot(self) -> Tuple[Any, Any]:
+        """(vectorizer, classifier) from the same update, never a mix of two."""
+        with self._lock:
+            return self.tfidf, self.model
+
+
+# ----------------------------------------------------------------------
+# Checkpoints
+# ----------------------------------------------------------------------
+def checkpoint_versions(base_name: str = "default") -> List[int]:
+    """Version numbers of the checkpoints of a base model, ascending."""
+    pattern = re.compile(rf"{re.escape(base_name)}-v(\d+)")
+    versions = []
+    for name in list_available_models():
+        m = pattern.fullmatch(name)
+        if m and model_metadata_path(name).is_file():
+            versions.append(int(m.group(1)))
+    return sorted(versions)
+
+
+def latest_checkpoint(base_name: str = "default") -> Tuple[str, Optional[Dict[str, Any]]]:
+    """(model name, metadata) of the newest checkpoint, or (base_name, None)."""
+    versions = checkpoint_versions(base_name)
+    if not versions:
+        return base_name, None
+    name = f"{base_name}-v{versions[-1]}"
+    with open(model_metadata_path(name), encoding="utf-8") as f:
+        return name, json.load(f)
+
+
+def apply_feedback(
+    store: FeedbackStore,
+    base_name: str = "default",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stop_words: Optional[Set[str]] = None,
+    tokenizer: str = "nltk",
+    publish: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Apply feedback received since the latest checkpoint and write a new one.
+
+    Returns the new checkpoint's metadata, or None when there was no new
+    feedback.
+    """
+    parent, meta = latest_checkpoint(base_name)
+    start = meta["feedback_offset"] if meta else 0
+    tfidf, model = load_model(parent)
+    trainer = OnlineTrainer(tfidf, model, stop_words=stop_words, tokenizer=tokenizer)
+    offset = start
+    for batch in chunked(store.read(start), batch_size):
+        trainer.update([r["text"] for _, r in batch], [r["label"] for _, r in batch])
+        offset = batch[-1][0]
+    if trainer.records == 0:
+        return None
+
+    version = (checkpoint_versions(base_name) or [0])[-1] + 1
+    name = f"{base_name}-v{version}"
+    tfidf, model = trainer.snapshot()
+    save_model(tfidf, model, name)
+    new_meta = {
+        "name": name,
+        "base": base_name,
+        "version": version,
+        "parent": parent,
+        "feedback_path": str(store.path),
+        "feedback_offset": offset,
+        "records": trainer.records,
+        "total_records": (meta["total_records"] if meta else 0) + trainer.records,
+        "class_count": [float(c) for c in model.class_count_],
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(model_metadata_path(name), "w", encoding="utf-8") as f:
+        json.dump(new_meta, f, indent=2)
+    if publish:
+        save_model(tfidf, model, publish)
+    logger.info("Checkpoint %s: %d feedback records on top of %s", name, trainer.records, parent)
+    return new_meta
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def _cmd_add(args) -> int:
+    store = FeedbackStore(args.store)
+    text = args.text if args.text is not None else sys.stdin.read()
+    store.add(text, args.label, source=args.source)
+    logger.info("Recorded %s feedback in %s", args.label, store.path)
+    return 0
+
+
+def _cmd_apply(args) -> int:
+    setup_nltk(punkt=args.tokenizer == "nltk")
+    stop_words = get_stopwords()
+    store = FeedbackStore(args.store)
+    while True:
+        meta = apply_feedback(
+            store, args.model, batch_size=args.batch_size,
+            stop_words=stop_words, tokenizer=args.tokenizer, publish=args.publish,
+        )
+        if meta is None:
+            logger.info("No new feedback in %s", store.path)
+        if not args.watch:
+            return 0
+        time.sleep(args.watch)
+
+
+def _cmd_status(args) -> int:
+    store = FeedbackStore(args.store)
+    name, meta = latest_checkpoint(args.model)
+    pending = sum(1 for _ in store.read(meta["feedback_offset"] if meta else 0))
+    print(json.dumps({
+        "feedback_path": str(store.path),
+        "latest_checkpoint": name if meta else None,
+        "total_records": meta["total_records"] if meta else 0,
+        "pending_records": pending,
+    }, indent=2))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.feedback", description="Incremental model updates from feedback.")
+    parser.add_argument("--store", type=Path, help="Feedback log (default: Data/feedback/feedback.jsonl)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Record one labelled message")
+    add.add_argument("text", nargs="?", help="Message text (default: read stdin)")
+    add.add_argument("--label", required=True, choices=sorted(LABEL_VALUES))
+    add.add_argument("--source", help="Who or what labelled the message")
+    add.set_defaults(func=_cmd_add)
+    apply = sub.add_parser("apply", help="Fold new feedback into the model and write a checkpoint")
+    apply.add_argument("--model", default="default", help="Base model name; checkpoints are {model}-v{n}")
+    apply.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Messages per partial_fit call")
+    apply.add_argument("--tokenizer", choices=TOKENIZERS, default="nltk")
+    apply.add_argument("--publish", metavar="NAME", help="Also write the new checkpoint as model NAME")
+    apply.add_argument("--watch", type=float, metavar="SECONDS", help="Keep applying new feedback at this interval")
+    apply.set_defaults(func=_cmd_apply)
+    status = sub.add_parser("status", help="Show the latest checkpoint and pending feedback")
+    status.add_argument("--model", default="default")
+    status.set_defaults(func=_cmd_status)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        return args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
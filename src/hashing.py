@@ -0,0 +1,107 @@
+"""
+Feature-hashing vectorizer with TF-IDF reweighting.
+
+Drop-in alternative to TfidfVectorizer for unbounded vocabularies: tokens
+are hashed straight to one of n_features columns, so there is no
+vocabulary lookup, memory does not grow with the corpus, and terms never
+seen in training still get a column. Document frequencies are kept per
+column and can be updated with partial_fit, so both the IDF stage and a
+MultinomialNB on top of it learn new terms incrementally.
+
+Train one with `python -m src.train --vectorizer hashing --publish NAME`;
+load_model(NAME) then returns it like any other vectorizer.
+"""
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+DEFAULT_N_FEATURES = 2 ** 18
+UNSEEN_TERM = "(unseen term)"
+
+
+class HashingTfidfVectorizer:
+    """Hashed term counts reweighted by smoothed IDF, like TfidfVectorizer.
+
+    transform() gives the same values TfidfVectorizer would for the same
+    tokens (sklearn's default token pattern, lowercasing, smooth IDF, l2
+    norm), except that colliding terms share a column. Column -> term names
+    are remembered for at most one term per column, for explanations only.
+    """
+
+    def __init__(
+        self,
+        n_features: int = DEFAULT_N_FEATURES,
+        sublinear_tf: bool = False,
+        norm: Optional[str] = "l2",
+    ):
+        self.n_features = n_features
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.n_docs_ = 0
+        self.df_ = np.zeros(n_features, dtype=np.int64)
+        self.idf_ = np.ones(n_features, dtype=np.float64)
+        self.terms_: Dict[int, str] = {}
+        self._hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+    def _counts(self, raw_documents: Iterable[str]):
+        return self._hasher.transform(raw_documents).tocsr()
+
+    def partial_fit(self, raw_documents: Iterable[str]) -> "HashingTfidfVectorizer":
+        """Add documents to the document-frequency statistics."""
+        docs = list(raw_documents)
+        counts = self._counts(docs)
+        self.n_docs_ += counts.shape[0]
+        self.df_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = np.log((1 + self.n_docs_) / (1 + self.df_)) + 1.0
+        analyze = self.build_analyzer()
+        seen = set()
+        for doc in docs:
+            seen.update(analyze(doc))
+        for term in sorted(seen):
+            self.terms_.setdefault(self.column(term), term)
+        return self
+
+    def fit(self, raw_documents: Iterable[str]) -> "HashingTfidfVectorizer":
+        self.n_docs_ = 0
+        self.df_ = np.zeros(self.n_features, dtype=np.int64)
+        self.terms_ = {}
+        return self.partial_fit(raw_documents)
+
+    def fit_transform(self, raw_documents: Iterable[str]):
+        docs = list(raw_documents)
+        return self.fit(docs).transform(docs)
+
+    def transform(self, raw_documents: Iterable[str]):
+        """Sparse (n_docs, n_features) TF-IDF matrix."""
+        X = self._counts(raw_documents).astype(np.float64)
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf_[X.indices]
+        if self.norm:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def build_analyzer(self):
+        """Callable that splits a document into the terms that get hashed."""
+        return self._hasher.build_analyzer()
+
+    def column(self, term: str) -> int:
+        """Column a term hashes to (same mapping as HashingVectorizer)."""
+        h = murmurhash3_32(term, seed=0, positive=False)
+        if h == -2 ** 31:
+            return (2 ** 31 - 1 - (self.n_features - 1)) % self.n_features
+        return abs(h) % self.n_features
+
+    def get_feature_names_out(self) -> np.ndarray:
+        """Column names: the first training term seen in each column."""
+        names = np.full(self.n_features, UNSEEN_TERM, dtype=object)
+        for col, term in self.terms_.items():
+            names[col] = term
+        return names
+
+    def __repr__(self) -> str:
+        return f"HashingTfidfVectorizer(n_features={self.n_features})"
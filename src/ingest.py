@@ -0,0 +1,283 @@
+"""
+Message ingestion for bulk scoring.
+
+Readers yield one message dict at a time ({"id", "text", "headers"}) so
+callers can score arbitrarily large inputs in fixed-size chunks:
+  - iter_csv:      CSV or TSV with a text column (e.g. Data/raw/spam.csv)
+  - iter_jsonl:    one JSON object per line
+  - iter_eml_dir:  a directory of .eml files
+  - iter_mbox:     an mbox archive, read in a single streaming pass
+  - iter_maildir:  a Maildir (cur/ and new/, plus Maildir++ subfolders)
+
+Email readers hold one raw message in memory at a time, so multi-gigabyte
+archives are scored in constant memory.
+"""
+import csv
+import json
+import os
+import re
+import sys
+from email import policy
+from email.parser import BytesParser
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Column names tried, in order, when no text column is given
+TEXT_COLUMNS = ("text", "message", "body", "v2")
+INPUT_FORMATS = ("csv", "jsonl", "eml", "mbox", "maildir")
+# Formats whose messages carry parsed email headers
+EMAIL_FORMATS = ("eml", "mbox", "maildir")
+# Maildir subdirectories holding delivered messages (tmp/ is in-flight)
+MAILDIR_SUBDIRS = ("new", "cur")
+
+
+def _auth_status(auth: str, key: str) -> str:
+    m = re.search(rf"{key}\s*=\s*(pass|fail|softfail|neutral|temperror|permerror)", auth, re.I)
+    return (m.group(1).lower() if m else 'unknown')
+
+
+def _message_text_and_headers(msg) -> Tuple[str, Dict[str, str]]:
+    """Extract plain text and key headers from a parsed email.message.Message."""
+    headers = {
+        'From': msg.get('From', ''),
+        'To': msg.get('To', ''),
+        'Subject': msg.get('Subject', ''),
+        'Authentication-Results': msg.get('Authentication-Results', '')
+    }
+
+    # Parse SPF/DKIM/DMARC summary if present
+    try:
+        auth = headers['Authentication-Results'] or ''
+        headers['SPF'] = _auth_status(auth, 'spf')
+        headers['DKIM'] = _auth_status(auth, 'dkim')
+        headers['DMARC'] = _auth_status(auth, 'dmarc')
+    except Exception:
+        headers['SPF'] = headers['DKIM'] = headers['DMARC'] = 'unknown'
+
+    # Extract a plain text body best-effort
+    text = ''
+    try:
+        if msg.is_multipart():
+            for part in msg.walk():
+                ctype = part.get_content_type()
+                if ctype == 'text/plain':
+                    try:
+                        text += part.get_content() or ''
+                    except Exception:
+                        payload = part.get_payload(decode=True) or b''
+                        text += payload.decode(part.get_content_charset() or 'utf-8', errors='ignore')
+        else:
+            if msg.get_content_type() == 'text/plain':
+                try:
+                    text = msg.get_content() or ''
+                except Exception:
+                    payload = msg.get_payload(decode=True) or b''
+                    text = payload.decode(msg.get_content_charset() or 'utf-8', errors='ignore')
+            else:
+                payload = msg.get_payload(decode=True) or b''
+                text = payload.decode(msg.get_content_charset() or 'utf-8', errors='ignore')
+    except Exception:
+        pass
+
+    return text, headers
+
+
+def extract_eml_text_and_headers(data: bytes) -> Tuple[str, Dict[str, str]]:
+    """Extract plain text and key headers from an .eml payload."""
+    try:
+        msg = BytesParser(policy=policy.default).parsebytes(data)
+    except Exception:
+        return "", {}
+    return _message_text_and_headers(msg)
+
+
+# ----------------------------------------------------------------------
+# Readers
+# ----------------------------------------------------------------------
+def _pick_text_column(fields: Iterable[str], text_column: Optional[str]) -> str:
+    fields = list(fields)
+    if text_column:
+        if text_column not in fields:
+            raise ValueError(f"Column {text_column!r} not found; available: {fields}")
+        return text_column
+    lowered = {f.lower(): f for f in fields}
+    for name in TEXT_COLUMNS:
+        if name in lowered:
+            return lowered[name]
+    raise ValueError(f"No text column found (tried {TEXT_COLUMNS}); pass one explicitly")
+
+
+def iter_csv(
+    path: Path,
+    text_column: Optional[str] = None,
+    id_column: Optional[str] = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream rows of a CSV file as messages.
+
+    delimiter defaults to a tab for .tsv files and a comma otherwise.
+    """
+    if delimiter is None:
+        delimiter = "\t" if Path(path).suffix.lower() == ".tsv" else ","
+    with open(path, newline="", encoding=encoding, errors="replace") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        column = _pick_text_column(reader.fieldnames or [], text_column)
+        for n, row in enumerate(reader, 1):
+            yield {
+                "id": row.get(id_column) if id_column else str(n),
+                "text": row.get(column) or "",
+                "headers": None,
+            }
+
+
+def iter_jsonl(
+    path: Path,
+    text_column: Optional[str] = None,
+    id_column: Optional[str] = None,
+    encoding: str = "utf-8",
+) -> Iterator[Dict[str, Any]]:
+    """Stream objects from a JSON Lines file ('-' reads stdin) as messages."""
+    f = sys.stdin if str(path) == "-" else open(path, encoding=encoding, errors="replace")
+    try:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{n}: invalid JSON ({e})")
+            column = _pick_text_column(obj.keys(), text_column)
+            yield {
+                "id": str(obj.get(id_column or "id", n)),
+                "text": obj.get(column) or "",
+                "headers": None,
+            }
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def iter_eml_dir(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream every .eml file under a directory (recursively, sorted)."""
+    for eml in sorted(Path(path).rglob("*.eml")):
+        text, headers = extract_eml_text_and_headers(eml.read_bytes())
+        yield {"id": str(eml.relative_to(path)), "text": text, "headers": headers}
+
+
+def split_mbox(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield the raw messages of an mbox stream one at a time.
+
+    Splits like mailbox.mbox: every line starting with "From " begins a new
+    message, the "From " line itself is dropped, a blank line just before
+    it (or at the end of the file) is part of the separator, and anything
+    before the first "From " line is ignored. Unlike mailbox.mbox there is
+    no up-front scan to index the file, so the first message is available
+    immediately and the stream may be a pipe.
+    """
+    lines: Optional[List[bytes]] = None
+    for line in stream:
+        if line.startswith(b"From "):
+            if lines is not None:
+                yield _join_mbox_lines(lines)
+            lines = []
+        elif lines is not None:
+            lines.append(line)
+    if lines is not None:
+        yield _join_mbox_lines(lines)
+
+
+def _join_mbox_lines(lines: List[bytes]) -> bytes:
+    if lines and lines[-1] in (b"\n", b"\r\n"):
+        lines.pop()
+    return b"".join(lines)
+
+
+def iter_mbox(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream messages from an mbox archive ('-' reads stdin). Ids count from 0."""
+    f = sys.stdin.buffer if str(path) == "-" else open(path, "rb")
+    try:
+        for key, data in enumerate(split_mbox(f)):
+            text, headers = extract_eml_text_and_headers(data)
+            yield {"id": str(key), "text": text, "headers": headers}
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def is_maildir(path: Path) -> bool:
+    """Whether path looks like a Maildir (has cur/ and new/)."""
+    path = Path(path)
+    return all((path / sub).is_dir() for sub in MAILDIR_SUBDIRS)
+
+
+def iter_maildir(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream messages from a Maildir and its Maildir++ subfolders (".Name/").
+
+    Ids are paths relative to the Maildir root. Messages moved or deleted
+    by a mail client while reading are skipped.
+    """
+    root = Path(path)
+    folders = [root] + sorted(p for p in root.iterdir() if p.name.startswith(".") and is_maildir(p))
+    for folder in folders:
+        for sub in MAILDIR_SUBDIRS:
+            directory = folder / sub
+            if not directory.is_dir():
+                continue
+            with os.scandir(directory) as entries:
+                names = sorted(e.name for e in entries if e.is_file() and not e.name.startswith("."))
+            for name in names:
+                file = directory / name
+                try:
+                    data = file.read_bytes()
+                except FileNotFoundError:
+                    continue
+                text, headers = extract_eml_text_and_headers(data)
+                yield {"id": str(file.relative_to(root)), "text": text, "headers": headers}
+
+
+def detect_format(path: Path) -> str:
+    """Guess the input format from a path."""
+    path = Path(path)
+    if path.is_dir():
+        return "maildir" if is_maildir(path) else "eml"
+    suffix = path.suffix.lower()
+    if suffix in (".csv", ".tsv"):
+        return "csv"
+    if suffix in (".jsonl", ".ndjson", ".json") or str(path) == "-":
+        return "jsonl"
+    if suffix in (".mbox", ".mbx") or path.name.lower() == "mbox":
+        return "mbox"
+    raise ValueError(f"Cannot detect input format of {path}; pass --format")
+
+
+def iter_messages(path: Path, fmt: Optional[str] = None, **options) -> Iterator[Dict[str, Any]]:
+    """Stream messages from path in the given (or detected) format.
+
+    options (text_column, id_column, encoding) apply to csv and jsonl and
+    are ignored for email sources.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        return iter_csv(path, **options)
+    if fmt == "jsonl":
+        return iter_jsonl(path, **options)
+    if fmt == "eml":
+        return iter_eml_dir(path)
+    if fmt == "mbox":
+        return iter_mbox(path)
+    if fmt == "maildir":
+        return iter_maildir(path)
+    raise ValueError(f"Unknown input format {fmt!r}; expected one of {INPUT_FORMATS}")
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to size items without materializing the input."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
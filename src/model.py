@@ -1,17 +1,28 @@
+import hashlib
+import json
+import os
 import pickle
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Sequence, Set
 
 import numpy as np
 
+from src.nlp import PreprocessPool, preprocess_tokens
+from src.scorer import linear_weights
+from src.vectorize import TokenVectorizer
+
+# Spam probability a message must exceed to be labelled spam (1)
+DEFAULT_THRESHOLD = 0.5
+
 
 def _model_dir() -> Path:
     """Resolve model directory relative to project root (parent of src)."""
     return Path(__file__).resolve().parent.parent / "Models"
 
 
-def load_model(model_name: str = "default"):
-    """Load TF-IDF vectorizer and classifier from disk. Use with st.cache_data in app.
+def _model_paths(model_name: str = "default") -> Tuple[Path, Path]:
+    """(vectorizer, classifier) pickle paths for a model name.
 
     Naming convention:
       - default: Models/vectorizer.pkl and Models/model.pkl
@@ -19,39 +30,203 @@ def load_model(model_name: str = "default"):
     """
     base = _model_dir()
     if model_name == "default":
-        vec_path = base / "vectorizer.pkl"
-        model_path = base / "model.pkl"
-    else:
-        vec_path = base / f"vectorizer_{model_name}.pkl"
-        model_path = base / f"model_{model_name}.pkl"
+        return base / "vectorizer.pkl", base / "model.pkl"
+    return base / f"vectorizer_{model_name}.pkl", base / f"model_{model_name}.pkl"
+
+
+def model_metadata_path(model_name: str = "default") -> Path:
+    """JSON sidecar describing how a model was produced (Models/model_{name}.json)."""
+    return _model_paths(model_name)[1].with_suffix(".json")
+
+
+def model_pair_path(model_name: str = "default") -> Path:
+    """Checksums of a published vectorizer/classifier pair (Models/model_{name}.pair)."""
+    return _model_paths(model_name)[1].with_suffix(".pair")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_model(model_name: str = "default"):
+    """Load TF-IDF vectorizer and classifier from disk. Shared via st.cache_resource in app.
+
+    See _model_paths for the file naming convention. When a pair file
+    written by save_model exists, both pickles must match its checksums,
+    so a vectorizer and classifier from two different publishes are never
+    loaded together; ValueError is raised instead.
+    """
+    vec_path, model_path = _model_paths(model_name)
     if not vec_path.is_file() or not model_path.is_file():
         raise FileNotFoundError(
             f"Model files not found. Expected {vec_path} and {model_path}"
         )
-    with open(vec_path, "rb") as f:
-        tfidf = pickle.load(f)
-    with open(model_path, "rb") as f:
-        model = pickle.load(f)
+    vec_data = vec_path.read_bytes()
+    model_data = model_path.read_bytes()
+    pair_path = model_pair_path(model_name)
+    if pair_path.is_file():
+        with open(pair_path, encoding="utf-8") as f:
+            pair = json.load(f)
+        if pair.get("vectorizer") != _sha256(vec_data) or pair.get("model") != _sha256(model_data):
+            raise ValueError(
+                f"{vec_path.name} and {model_path.name} do not match {pair_path.name}; the model is "
+                f"being published, or its pickles were replaced by hand (publish with save_model "
+                f"or delete {pair_path.name})"
+            )
+    tfidf = pickle.loads(vec_data)
+    model = pickle.loads(model_data)
     return tfidf, model
 
 
-def predict(text: str, tfidf, model):
-    vector = tfidf.transform([text])
-    prediction = model.predict(vector)[0]
+def _replace_file(path: Path, data: bytes):
+    """Write data to a temporary name and rename it over path."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def save_model(tfidf, model, model_name: str) -> Tuple[Path, Path]:
+    """Pickle a vectorizer and classifier under a model name (see _model_paths).
+
+    Each file is written to a temporary name and renamed into place, so
+    readers such as the model registry never see a partial pickle. The
+    pair file with both pickles' checksums is replaced last: until it is,
+    load_model refuses the half-published pair. Returns (vectorizer,
+    classifier) paths.
+    """
+    paths = _model_paths(model_name)
+    paths[0].parent.mkdir(parents=True, exist_ok=True)
+    blobs = [pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL) for obj in (tfidf, model)]
+    for path, data in zip(paths, blobs):
+        _replace_file(path, data)
+    pair = {"vectorizer": _sha256(blobs[0]), "model": _sha256(blobs[1])}
+    _replace_file(model_pair_path(model_name), json.dumps(pair, indent=2).encode("utf-8"))
+    return paths
+
+
+def model_version(model_name: str = "default") -> str:
+    """Short version tag for a model's files on disk (changes when any of them does)."""
+    h = hashlib.sha1()
+    for path in _model_paths(model_name):
+        st = path.stat()
+        h.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    pair_path = model_pair_path(model_name)
+    if pair_path.is_file():
+        st = pair_path.stat()
+        h.update(f"{pair_path.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:12]
+
+
+def _proba_matrix(vectors, model) -> np.ndarray:
+    """Return an (n_samples, 2) [ham, spam] probability matrix for vectorized rows."""
     # Not all models support predict_proba (e.g., LinearSVC). Guard accordingly.
     if hasattr(model, "predict_proba"):
-        proba = model.predict_proba(vector)[0]
+        return np.asarray(model.predict_proba(vectors))
+    # Fallback: squash decision_function scores to (0,1); else neutral.
+    if hasattr(model, "decision_function"):
+        scores = np.asarray(model.decision_function(vectors), dtype=float).ravel()
+        spam_p = 1 / (1 + np.exp(-scores))
+        return np.column_stack([1 - spam_p, spam_p])
+    return np.full((vectors.shape[0], 2), 0.5)
+
+
+def score_vectors(
+    vectors,
+    model,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score already-vectorized rows with a single probability pass.
+
+    The label is derived from the spam probability instead of calling
+    model.predict separately, so the model is evaluated once per batch.
+    A row is labelled spam (1) when its spam probability exceeds threshold;
+    at the default of 0.5 this matches model.predict.
+
+    Returns (predictions, probas) with shapes (n,) and (n, 2) [ham, spam].
+    """
+    probas = _proba_matrix(vectors, model)
+    predictions = (probas[:, 1] > threshold).astype(int)
+    return predictions, probas
+
+
+def predict(text: str, tfidf, model, threshold: float = DEFAULT_THRESHOLD):
+    """Predict a single preprocessed message. Returns (prediction, [ham, spam] proba)."""
+    predictions, probas = score_vectors(vectorize_tokens([text.split()], tfidf), model, threshold)
+    return predictions[0], probas[0]
+
+
+def predict_batch(
+    texts: Sequence[str],
+    tfidf,
+    model,
+    stop_words: Optional[Set[str]] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    tokenizer: str = "nltk",
+    pool: Optional[PreprocessPool] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Preprocess and score many raw messages in one vectorized pass.
+
+    All messages are transformed first, then vectorized with a single
+    tfidf.transform call and scored with a single probability call, so the
+    per-call sklearn validation overhead is paid once per batch instead of
+    once per message.
+
+    tokenizer is passed through to transformed_text ("nltk" or "regex").
+    When a PreprocessPool is given, preprocessing is sharded across its
+    worker processes instead (using the pool's stop words and tokenizer).
+
+    Returns (predictions, probas) where predictions has shape (n,) and
+    probas has shape (n, 2) in [ham, spam] order.
+    """
+    if not texts:
+        return np.empty(0, dtype=int), np.empty((0, 2))
+    vectors = vectorize_batch(texts, tfidf, stop_words=stop_words, tokenizer=tokenizer, pool=pool)
+    return score_vectors(vectors, model, threshold)
+
+
+def vectorize_batch(
+    texts: Sequence[str],
+    tfidf,
+    stop_words: Optional[Set[str]] = None,
+    tokenizer: str = "nltk",
+    pool: Optional[PreprocessPool] = None,
+):
+    """Preprocess raw messages and vectorize them in one pass.
+
+    Returns the sparse (n, n_features) TF-IDF matrix, e.g. for score_vectors
+    and explain_batch on the same rows.
+    """
+    if pool is not None:
+        token_lists = [t.split() for t in pool.transform(texts)]
     else:
-        # Fallback: produce a pseudo-probability vector centered at 0.5
-        # based on decision_function if available; else neutral.
-        if hasattr(model, "decision_function"):
-            score = float(model.decision_function(vector)[0])
-            # Squash to (0,1) and form [ham, spam] ordering
-            spam_p = 1 / (1 + np.exp(-score))
-            proba = np.array([1 - spam_p, spam_p])
-        else:
-            proba = np.array([0.5, 0.5])
-    return prediction, proba
+        token_lists = [preprocess_tokens(t, stop_words=stop_words, tokenizer=tokenizer) for t in texts]
+    return vectorize_tokens(token_lists, tfidf)
+
+
+@lru_cache(maxsize=8)
+def _token_vectorizer(tfidf) -> Optional[TokenVectorizer]:
+    """TokenVectorizer for a loaded vectorizer, or None if it cannot be compiled."""
+    try:
+        return TokenVectorizer.from_vectorizer(tfidf)
+    except ValueError:
+        return None
+
+
+def vectorize_tokens(token_lists: Sequence[Sequence[str]], tfidf):
+    """TF-IDF rows for preprocessed token lists (see src.vectorize).
+
+    Equal to tfidf.transform on the space-joined token lists, without
+    building those strings and re-tokenizing them.
+    """
+    vectorizer = _token_vectorizer(tfidf)
+    if vectorizer is None:
+        return tfidf.transform([" ".join(tokens) for tokens in token_lists])
+    return vectorizer.transform(token_lists)
 
 
 def list_available_models() -> List[str]:
@@ -94,55 +269,68 @@ def explain_prediction(
       - negative: list of (word, contribution)
     Contributions are approximated as (feature_value * weight_diff).
     """
+    return explain_vector(vectorize_tokens([transformed_text.split()], tfidf), tfidf, model, top_k)
+
+
+def explain_vector(
+    vec,
+    tfidf,
+    model,
+    top_k: int = 10
+) -> Dict[str, List[Tuple[str, float]]]:
+    """explain_prediction for an already-vectorized 1 x n_features row."""
+    return explain_batch(vec, tfidf, model, top_k)[0]
+
+
+@lru_cache(maxsize=8)
+def _explain_arrays(tfidf, model) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Feature names and spam-minus-ham weights, cached per loaded model."""
     try:
         feature_names = tfidf.get_feature_names_out()
     except Exception:
         # Legacy support
         feature_names = np.array(tfidf.get_feature_names())
+    names = np.array([str(n) for n in feature_names], dtype=object)
+    # MultinomialNB and sigmoid-probability linear models; None for other classifiers
+    weights = linear_weights(model)
+    return names, (weights[0] if weights is not None else None)
+
+
+def _top_k_per_row(rows: np.ndarray, cols: np.ndarray, contrib: np.ndarray, top_k: int, descending: bool):
+    """Keep each row's top_k entries, ordered by contribution then column."""
+    order = np.lexsort((cols, -contrib if descending else contrib, rows))
+    rows, cols, contrib = rows[order], cols[order], contrib[order]
+    rank = np.arange(rows.size) - np.searchsorted(rows, rows, side="left")
+    keep = rank < top_k
+    return rows[keep], cols[keep], contrib[keep]
+
+
+def explain_batch(
+    vectors,
+    tfidf,
+    model,
+    top_k: int = 10
+) -> List[Dict[str, List[Tuple[str, float]]]]:
+    """Word impact explanations for every row of an (n, n_features) TF-IDF matrix.
+
+    Each row's contributions (feature_value * weight_diff) are computed in
+    one vectorized pass over the matrix's non-zeros; only the kept top_k
+    positive and negative entries per row are turned into Python tuples.
+    Results match explain_prediction row by row.
+    """
+    n = vectors.shape[0]
+    names, weight_diff = _explain_arrays(tfidf, model)
+    out: List[Dict[str, List[Tuple[str, float]]]] = [{"positive": [], "negative": []} for _ in range(n)]
+    if weight_diff is None or top_k <= 0:
+        return out
+
+    csr = vectors.tocsr()
+    rows = np.repeat(np.arange(n), np.diff(csr.indptr))
+    cols = csr.indices
+    contrib = csr.data * weight_diff[cols]
 
-    vec = tfidf.transform([transformed_text])  # 1 x n_features (sparse)
-    vec_coo = vec.tocoo()
-
-    pos_list: List[Tuple[str, float]] = []
-    neg_list: List[Tuple[str, float]] = []
-
-    weight_diff: Optional[np.ndarray] = None
-
-    # Linear models (LogReg, LinearSVC (if coef_), SGDClassifier, etc.)
-    if hasattr(model, "coef_"):
-        coef = getattr(model, "coef_")  # shape: (1, n_features) for binary
-        if coef is not None:
-            if coef.ndim == 2 and coef.shape[0] == 1:
-                weight_diff = coef[0]
-            elif coef.ndim == 2 and coef.shape[0] == 2:
-                weight_diff = coef[1] - coef[0]
-    # MultinomialNB
-    elif hasattr(model, "feature_log_prob_") and hasattr(model, "classes_"):
-        flp = getattr(model, "feature_log_prob_")  # (n_classes, n_features)
-        classes = list(getattr(model, "classes_"))
-        try:
-            spam_idx = classes.index(1)
-            ham_idx = classes.index(0)
-        except ValueError:
-            spam_idx, ham_idx = 1, 0
-        weight_diff = flp[spam_idx] - flp[ham_idx]
-
-    if weight_diff is None:
-        return {"positive": [], "negative": []}
-
-    # Compute contributions only for non-zero terms in the vector
-    for idx, value in zip(vec_coo.col, vec_coo.data):
-        contrib = float(value * weight_diff[idx])
-        word = str(feature_names[idx])
-        if contrib > 0:
-            pos_list.append((word, contrib))
-        elif contrib < 0:
-            neg_list.append((word, contrib))
-
-    pos_list.sort(key=lambda x: x[1], reverse=True)
-    neg_list.sort(key=lambda x: x[1])  # most negative first
-
-    return {
-        "positive": pos_list[:top_k],
-        "negative": neg_list[:top_k],
-    }
+    for key, mask, descending in (("positive", contrib > 0, True), ("negative", contrib < 0, False)):
+        r, c, v = _top_k_per_row(rows[mask], cols[mask], contrib[mask], top_k, descending)
+        for row, word, value in zip(r.tolist(), names[c].tolist(), v.tolist()):
+            out[row][key].append((word, value))
+    return out
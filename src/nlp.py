@@ -1,19 +1,125 @@
+import csv
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set
+
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem.porter import PorterStemmer
-from typing import Optional, Set
 
 ps = PorterStemmer()
 
+# Token -> stem memo. Message vocabularies are heavily Zipfian, so a bounded
+# LRU absorbs almost all PorterStemmer calls. lru_cache is thread-safe and
+# exposes hit/miss counters through stem_cache_info().
+STEM_CACHE_SIZE = 65_536
+_cached_stem = lru_cache(maxsize=STEM_CACHE_SIZE)(ps.stem)
+
+# ---------------------------------------------------------------------------
+# Fast tokenizer
+#
+# transformed_text keeps only the purely alphanumeric tokens produced by
+# nltk.word_tokenize. _FAST_TOKEN_RE finds those tokens in one pass:
+# an alphanumeric run is kept when both of its edges are places where the
+# Treebank/Punkt pipeline would insert a split (whitespace, padded
+# punctuation, comma/colon not followed by a digit, "..", "--", a sentence
+# period, or a clitic such as n't / 's). Runs glued to anything else
+# ("1,000", "u.s", "e-mail") are dropped, as word_tokenize + isalnum does.
+# Punkt's learned abbreviation list cannot be reproduced, so "ok." style
+# abbreviations are treated as sentence ends.
+# ---------------------------------------------------------------------------
+_PADDED = ";@#$%&?!*()\\[\\]{}<>\"«“‘„`»”’"
+# Punkt considers a period a sentence break when followed by these or whitespace
+_DOT_BREAK = r"\.(?=[?!)\";}\]*:@'({\[]|\s|$)"
+_AFTER_CLITIC = rf"(?:[\s{_PADDED}]|$|[:,](?!\d)|{_DOT_BREAK})"
+_FAST_TOKEN_RE = re.compile(
+    # left edge
+    rf"(?:^|(?<=[\s{_PADDED}])|(?<=[:,])(?!\d)|(?<=\.\.)|(?<=--)"
+    r"|(?<=')(?!re|ve|ll|[mtsdn])(?=[^\W_]\b))"
+    # numbers and initials followed by ". word" are not sentence ends for Punkt
+    r"(?!(?:\d+|[^\W\d_])\.\s+[^\W\d_])"
+    r"[^\W_]+"
+    # right edge
+    rf"(?=[\s{_PADDED}]|$|[:,](?!\d)|\.\.|--|{_DOT_BREAK}"
+    r"|'(?!re|ve|ll|[mtsdn])[^\W_]\b"
+    rf"|(?:n't|'(?:s|m|d|ll|re|ve)?){_AFTER_CLITIC})"
+)
+# Words the Treebank contraction rules split in two
+_CONTRACTION_SPLITS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+TOKENIZERS = ("nltk", "regex")
+
+
+def stem(word: str) -> str:
+    """Porter-stem a token through the shared LRU cache."""
+    return _cached_stem(word)
+
+
+def stem_cache_info():
+    """Return (hits, misses, maxsize, currsize) for the stem cache."""
+    return _cached_stem.cache_info()
+
+
+def clear_stem_cache() -> None:
+    """Drop all cached stems and reset the hit/miss counters."""
+    _cached_stem.cache_clear()
+
+
+def _corpus_path() -> Path:
+    """Preprocessed corpus whose raw text column seeds the stem cache."""
+    return Path(__file__).resolve().parent.parent / "Data" / "preprocessed" / "transform_data.csv"
+
 
-def setup_nltk():
-    """Ensure required NLTK resources are available. Download only if missing."""
+def warm_stem_cache(words: Optional[Iterable[str]] = None, stop_words: Optional[Set[str]] = None) -> int:
+    """Pre-populate the stem cache and return the number of distinct words seen.
+
+    Without words, the vocabulary is read from the raw text column of
+    Data/preprocessed/transform_data.csv. Missing files are ignored.
+    """
+    if words is None:
+        vocab: Set[str] = set()
+        try:
+            with open(_corpus_path(), newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    vocab.update(re.findall(r"[^\W_]+", (row.get("text") or "").lower()))
+        except (FileNotFoundError, csv.Error, UnicodeDecodeError):
+            return 0
+        words = vocab
+    if stop_words is None:
+        stop_words = get_stopwords()
+    seen = 0
+    for w in set(words):
+        if w not in stop_words:
+            _cached_stem(w)
+            seen += 1
+    return seen
+
+
+def setup_nltk(punkt: bool = True):
+    """Ensure required NLTK resources are available. Download only if missing.
+
+    punkt=False skips the tokenizer models, which the "regex" tokenizer
+    mode of transformed_text does not need.
+    """
     # stopwords
     try:
         stopwords.words("english")
     except LookupError:
         nltk.download("stopwords", quiet=True)
 
+    if not punkt:
+        return
+
     # punkt tokenizer
     try:
         nltk.data.find("tokenizers/punkt")
@@ -31,7 +137,7 @@ def setup_nltk():
 
 
 def get_stopwords() -> Set[str]:
-    """Return English stopwords set. Call after setup_nltk(); use st.cache_data in app."""
+    """Return English stopwords set. Call after setup_nltk(); shared via st.cache_resource in app."""
     try:
         return set(stopwords.words("english"))
     except LookupError:
@@ -39,13 +145,141 @@ def get_stopwords() -> Set[str]:
         return set(stopwords.words("english"))
 
 
-def transformed_text(text: str, stop_words: Optional[Set[str]] = None) -> str:
-    """Normalize and stem text; exclude stop words. Pass cached stop_words from app when possible."""
+def fast_tokenize(text: str) -> List[str]:
+    """Alphanumeric tokens of lowercase text as word_tokenize + isalnum would keep them."""
+    words: List[str] = []
+    for w in _FAST_TOKEN_RE.findall(text):
+        split = _CONTRACTION_SPLITS.get(w)
+        if split:
+            words.extend(split)
+        else:
+            words.append(w)
+    return words
+
+
+def preprocess_tokens(text: str, stop_words: Optional[Set[str]] = None, tokenizer: str = "nltk") -> List[str]:
+    """Stemmed, stop-word-free tokens of text; transformed_text without the join.
+
+    tokenizer: "nltk" (word_tokenize, needs punkt) or "regex" (single
+    compiled-regex pass, no punkt download, same tokens in ~99% of messages).
+    """
     if stop_words is None:
         stop_words = get_stopwords()
     text = text.lower()
-    tokens = nltk.word_tokenize(text)
-    words = [w for w in tokens if w.isalnum()]
-    words = [w for w in words if w not in stop_words]
-    words = [ps.stem(w) for w in words]
-    return " ".join(words)
+    if tokenizer == "regex":
+        words = fast_tokenize(text)
+    elif tokenizer == "nltk":
+        tokens = nltk.word_tokenize(text)
+        words = [w for w in tokens if w.isalnum()]
+    else:
+        raise ValueError(f"Unknown tokenizer {tokenizer!r}; expected one of {TOKENIZERS}")
+    return [_cached_stem(w) for w in words if w not in stop_words]
+
+
+def transformed_text(text: str, stop_words: Optional[Set[str]] = None, tokenizer: str = "nltk") -> str:
+    """Normalize and stem text; exclude stop words. Pass cached stop_words from app when possible.
+
+    Same tokens as preprocess_tokens, joined with spaces.
+    """
+    return " ".join(preprocess_tokens(text, stop_words=stop_words, tokenizer=tokenizer))
+
+
+# ---------------------------------------------------------------------------
+# Multiprocess preprocessing
+#
+# transformed_text is pure Python and GIL-bound, so large batches are
+# sharded across worker processes. Each worker receives the stop word set
+# and tokenizer once through the pool initializer and keeps its own stem
+# cache; tasks carry whole shards to keep IPC overhead low.
+# ---------------------------------------------------------------------------
+# Batches smaller than this are transformed in-process
+PARALLEL_MIN_BATCH = 500
+
+_worker_stop_words: Optional[Set[str]] = None
+_worker_tokenizer = "nltk"
+
+
+def _init_preprocess_worker(stop_words: Set[str], tokenizer: str):
+    global _worker_stop_words, _worker_tokenizer
+    _worker_stop_words = stop_words
+    _worker_tokenizer = tokenizer
+
+
+def _transform_shard(texts: List[str]) -> List[str]:
+    return [
+        transformed_text(t, stop_words=_worker_stop_words, tokenizer=_worker_tokenizer)
+        for t in texts
+    ]
+
+
+class PreprocessPool:
+    """Reusable process pool that runs transformed_text over large batches.
+
+    Results come back in input order. Batches below min_parallel, or pools
+    with a single worker, are transformed serially in the calling process.
+    Use as a context manager or call close() to stop the workers.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        stop_words: Optional[Set[str]] = None,
+        tokenizer: str = "nltk",
+        min_parallel: int = PARALLEL_MIN_BATCH,
+    ):
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer {tokenizer!r}; expected one of {TOKENIZERS}")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.stop_words = stop_words if stop_words is not None else get_stopwords()
+        self.tokenizer = tokenizer
+        self.min_parallel = min_parallel
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started lazily so small jobs never pay for worker start-up
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_preprocess_worker,
+                initargs=(self.stop_words, self.tokenizer),
+            )
+        return self._executor
+
+    def transform(self, texts: Sequence[str]) -> List[str]:
+        """transformed_text for every message, in order."""
+        texts = list(texts)
+        if self.workers == 1 or len(texts) < self.min_parallel:
+            return [
+                transformed_text(t, stop_words=self.stop_words, tokenizer=self.tokenizer)
+                for t in texts
+            ]
+        # A few shards per worker balances uneven message lengths
+        shard_size = math.ceil(len(texts) / (self.workers * 4))
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        out: List[str] = []
+        for shard in self._pool().map(_transform_shard, shards):
+            out.extend(shard)
+        return out
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "PreprocessPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def transform_many(
+    texts: Sequence[str],
+    stop_words: Optional[Set[str]] = None,
+    tokenizer: str = "nltk",
+    workers: Optional[int] = None,
+    min_parallel: int = PARALLEL_MIN_BATCH,
+) -> List[str]:
+    """One-shot parallel transformed_text over a batch (serial when small)."""
+    with PreprocessPool(workers, stop_words, tokenizer, min_parallel) as pool:
+        return pool.transform(texts)
@@ -1,11 +1,10 @@
 import streamlit as st
-import nltk
 from collections import Counter
-from email import policy
-from email.parser import BytesParser
 
 from src.design import render_result_card
-from src.nlp import transformed_text
+from src.features import text_stats
+from src.ingest import extract_eml_text_and_headers
+from src.context import MessageContext
 from src.components.pattern_analysis import render_pattern_analysis
 from src.components.feature_analysis import render_advanced_feature_analysis
 from src.visualization import (
@@ -13,64 +12,7 @@ from src.visualization import (
     top_words_bar,
     characters_pie
 )
-from src.model import explain_prediction
-
-
-def _extract_eml_text_and_headers(data: bytes):
-    """Extract plain text and key headers from an .eml payload."""
-    try:
-        msg = BytesParser(policy=policy.default).parsebytes(data)
-    except Exception:
-        return "", {}
-
-    headers = {
-        'From': msg.get('From', ''),
-        'To': msg.get('To', ''),
-        'Subject': msg.get('Subject', ''),
-        'Authentication-Results': msg.get('Authentication-Results', '')
-    }
-
-    # Parse SPF/DKIM/DMARC summary if present
-    try:
-        import re
-        auth = headers['Authentication-Results'] or ''
-
-        def _status(key: str) -> str:
-            m = re.search(rf"{key}\\s*=\\s*(pass|fail|softfail|neutral|temperror|permerror)", auth, re.I)
-            return (m.group(1).lower() if m else 'unknown')
-
-        headers['SPF'] = _status('spf')
-        headers['DKIM'] = _status('dkim')
-        headers['DMARC'] = _status('dmarc')
-    except Exception:
-        headers['SPF'] = headers['DKIM'] = headers['DMARC'] = 'unknown'
-
-    # Extract a plain text body best-effort
-    text = ''
-    try:
-        if msg.is_multipart():
-            for part in msg.walk():
-                ctype = part.get_content_type()
-                if ctype == 'text/plain':
-                    try:
-                        text += part.get_content() or ''
-                    except Exception:
-                        payload = part.get_payload(decode=True) or b''
-                        text += payload.decode(part.get_content_charset() or 'utf-8', errors='ignore')
-        else:
-            if msg.get_content_type() == 'text/plain':
-                try:
-                    text = msg.get_content() or ''
-                except Exception:
-                    payload = msg.get_payload(decode=True) or b''
-                    text = payload.decode(msg.get_content_charset() or 'utf-8', errors='ignore')
-            else:
-                payload = msg.get_payload(decode=True) or b''
-                text = payload.decode(msg.get_content_charset() or 'utf-8', errors='ignore')
-    except Exception:
-        pass
-
-    return text, headers
+from src.model import DEFAULT_THRESHOLD, predict_batch
 
 
 def _status_emoji(status: str) -> str:
@@ -125,9 +67,11 @@ def _render_headers_card(headers: dict):
         st.write(f"DMARC: {_status_emoji(dmarc)}")
 
 
-def render_home_page(tfidf, model, spam_words_set, ham_words_set, stop_words):
+def render_home_page(tfidf, model, spam_words_set, ham_words_set, stop_words,
+                     threshold=DEFAULT_THRESHOLD):
     """
     Render the main home page with input section and prediction logic.
+    threshold: spam probability above which a message is labelled spam.
     """
     # Import here to avoid circular imports
     from src.components.input_section import render_input_section
@@ -154,7 +98,7 @@ def render_home_page(tfidf, model, spam_words_set, ham_words_set, stop_words):
                 try:
                     raw = uploaded_file.read()
                     if uploaded_file.name.lower().endswith('.eml'):
-                        text, headers = _extract_eml_text_and_headers(raw)
+                        text, headers = extract_eml_text_and_headers(raw)
                         if text.strip():
                             messages_to_analyze.append({'text': text, 'source': uploaded_file.name, 'headers': headers})
                     else:
@@ -208,53 +152,39 @@ def render_home_page(tfidf, model, spam_words_set, ham_words_set, stop_words):
             with st.spinner("🔎 Analyzing message with AI..."):
                 _analyze_single_message(
                     msg_data['text'], msg_data['source'],
-                    tfidf, model, spam_words_set, ham_words_set, stop_words
+                    tfidf, model, spam_words_set, ham_words_set, stop_words,
+                    threshold=threshold
                 )
         else:
             # Batch analysis
             _analyze_batch_messages(
-                messages_to_analyze, tfidf, model, spam_words_set, ham_words_set, stop_words
+                messages_to_analyze, tfidf, model, spam_words_set, ham_words_set, stop_words,
+                threshold=threshold
             )
 
 
-def _analyze_single_message(input_sms, source, tfidf, model, spam_words_set, ham_words_set, stop_words):
+def _analyze_single_message(input_sms, source, tfidf, model, spam_words_set, ham_words_set, stop_words,
+                            threshold=DEFAULT_THRESHOLD):
     """Analyze a single message and display detailed results."""
 
-    # Preprocess (pass cached stop_words for performance)
-    transformed_sms = transformed_text(input_sms, stop_words=stop_words)
-
-    # Vectorize + Predict
-    vector_input = tfidf.transform([transformed_sms])
-    # Prefer predict_proba when available
-    if hasattr(model, 'predict_proba'):
-        result = model.predict(vector_input)[0]
-        prediction_proba = model.predict_proba(vector_input)[0]
-    else:
-        # Fallback for models without predict_proba
-        result = model.predict(vector_input)[0]
-        try:
-            score = float(model.decision_function(vector_input)[0])
-        except Exception:
-            score = 0.0
-        import numpy as np
-        spam_prob_val = 1 / (1 + np.exp(-score))
-        prediction_proba = [1 - spam_prob_val, spam_prob_val]
-
-    confidence = max(prediction_proba) * 100
-    spam_prob = prediction_proba[1] * 100
-    ham_prob = prediction_proba[0] * 100
+    # Preprocess, vectorize, score and scan the message once; every panel
+    # below reads from this context (pass cached stop_words for performance)
+    ctx = MessageContext.build(input_sms, tfidf, model, stop_words=stop_words, threshold=threshold)
+    transformed_sms = ctx.transformed
+    result = ctx.prediction
+
+    confidence = ctx.confidence * 100
+    spam_prob = ctx.spam_probability * 100
+    ham_prob = ctx.ham_probability * 100
 
     # Message statistics
-    word_count = len(input_sms.split())
-    char_count = len(input_sms)
-    char_count_no_spaces = len(input_sms.replace(" ", ""))
-    try:
-        sentence_count = len(nltk.sent_tokenize(input_sms))
-    except LookupError:
-        sentence_count = max(1, input_sms.count('.') + input_sms.count('!') + input_sms.count('?'))
+    word_count = ctx.word_count
+    char_count = ctx.stats.length
+    char_count_no_spaces = ctx.stats.length - ctx.stats.spaces
+    sentence_count = ctx.sentence_count
 
     # Word frequency
-    words = transformed_sms.split()
+    words = ctx.words
     word_freq = Counter(words)
     top_words = dict(word_freq.most_common(10)) if words else {}
     words_list = list(top_words.keys())
@@ -269,7 +199,7 @@ def _analyze_single_message(input_sms, source, tfidf, model, spam_words_set, ham
 
     # Explanation (word impact)
     try:
-        exp = explain_prediction(transformed_sms, tfidf, model, top_k=8)
+        exp = ctx.explanation(top_k=8)
         _render_explanation(exp)
     except Exception:
         pass
@@ -291,15 +221,19 @@ def _analyze_single_message(input_sms, source, tfidf, model, spam_words_set, ham
         words_list=words_list,
         freq_list=freq_list,
         spam_words_set=spam_words_set,
-        ham_words_set=ham_words_set
+        ham_words_set=ham_words_set,
+        context=ctx
     )
 
 
 def _render_analysis_section(input_sms, transformed_sms, result, confidence, spam_prob,
                              ham_prob, word_count, char_count, char_count_no_spaces,
                              sentence_count, words, word_freq, words_list, freq_list,
-                             spam_words_set, ham_words_set):
-    """Render all analysis visualizations and insights."""
+                             spam_words_set, ham_words_set, context=None):
+    """Render all analysis visualizations and insights.
+
+    context is the message's MessageContext; panels reuse its precomputed data.
+    """
 
     # Probability bar (ham_prob first, spam_prob second)
     st.markdown("<br>", unsafe_allow_html=True)
@@ -352,12 +286,13 @@ def _render_analysis_section(input_sms, transformed_sms, result, confidence, spa
 
     with col2:
         if input_sms:
-            # Calculate character distribution
+            # Character distribution
+            stats = context.stats if context else text_stats(input_sms)
             char_types = {
-                'Letters': sum(1 for c in input_sms if c.isalpha()),
-                'Numbers': sum(1 for c in input_sms if c.isdigit()),
-                'Spaces': sum(1 for c in input_sms if c.isspace()),
-                'Special': sum(1 for c in input_sms if not c.isalnum() and not c.isspace())
+                'Letters': stats.letters,
+                'Numbers': stats.digits,
+                'Spaces': stats.whitespace,
+                'Special': stats.special
             }
             labels = list(char_types.keys())
             values = list(char_types.values())
@@ -369,16 +304,17 @@ def _render_analysis_section(input_sms, transformed_sms, result, confidence, spa
     # Pattern analysis
     render_pattern_analysis(
         input_sms, result, confidence, spam_prob, ham_prob,
-        words, spam_words_set, ham_words_set
+        words, spam_words_set, ham_words_set, context=context
     )
 
     # Advanced feature analysis
     render_advanced_feature_analysis(
-        input_sms, words, spam_words_set, ham_words_set
+        input_sms, words, spam_words_set, ham_words_set, context=context
     )
 
 
-def _analyze_batch_messages(messages, tfidf, model, spam_words_set, ham_words_set, stop_words):
+def _analyze_batch_messages(messages, tfidf, model, spam_words_set, ham_words_set, stop_words,
+                            threshold=DEFAULT_THRESHOLD):
     """Analyze multiple messages and display batch results."""
     st.markdown(f"""
         <div class="card" style="background: rgba(59, 130, 246, 0.1); border-left: 4px solid #3b82f6; margin: 1rem 0;">
@@ -392,29 +328,16 @@ def _analyze_batch_messages(messages, tfidf, model, spam_words_set, ham_words_se
         </div>
     """, unsafe_allow_html=True)
 
+    # Score every message in one vectorized pass
+    with st.spinner("🔎 Analyzing messages with AI..."):
+        predictions, probas = predict_batch(
+            [msg_data['text'] for msg_data in messages], tfidf, model,
+            stop_words=stop_words, threshold=threshold
+        )
+
     results = []
-    progress_bar = st.progress(0)
-
-    for idx, msg_data in enumerate(messages):
-        # Update progress
-        progress_bar.progress((idx + 1) / len(messages))
-
-        # Process message
-        transformed_sms = transformed_text(msg_data['text'], stop_words=stop_words)
-        vector_input = tfidf.transform([transformed_sms])
-        if hasattr(model, 'predict_proba'):
-            result = model.predict(vector_input)[0]
-            prediction_proba = model.predict_proba(vector_input)[0]
-        else:
-            result = model.predict(vector_input)[0]
-            try:
-                score = float(model.decision_function(vector_input)[0])
-            except Exception:
-                score = 0.0
-            import numpy as np
-            spam_prob_val = 1 / (1 + np.exp(-score))
-            prediction_proba = [1 - spam_prob_val, spam_prob_val]
-        confidence = max(prediction_proba) * 100
+    for msg_data, result, prediction_proba in zip(messages, predictions, probas):
+        confidence = prediction_proba[result] * 100
 
         results.append({
             'source': msg_data['source'],
@@ -427,8 +350,6 @@ def _analyze_batch_messages(messages, tfidf, model, spam_words_set, ham_words_se
             'preview': msg_data['text'][:100] + '...' if len(msg_data['text']) > 100 else msg_data['text']
         })
 
-    progress_bar.empty()
-
     # Display summary
     spam_count = sum(1 for r in results if r['is_spam'])
     ham_count = len(results) - spam_count
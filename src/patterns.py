@@ -0,0 +1,109 @@
+"""
+Shared keyword/phrase pattern engine.
+
+All keyword lists used by the analysis UI and feature extraction are
+compiled once into one matcher. A single tokenizing pass over a message
+returns every keyword present, and each caller derives its own indicators
+from that hit set instead of running a separate re.search per pattern.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Indicator label -> keywords. Keywords match case-insensitively as whole
+# words; a trailing "*" matches any word starting with the stem.
+SPAM_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    'Free/Freebie': ('free',),
+    'Win/Prize': ('win', 'won', 'prize', 'award'),
+    'Urgent': ('urgent',),
+    'Click Here': ('click',),
+    'Limited Time': ('limited', 'time', 'offer', 'expire'),
+    'Money/Cash': ('money', 'cash', 'dollar', '£', '€', '$'),
+    'Congratulations': ('congrat*',),
+}
+HAM_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    'Personal Greeting': ('hi', 'hello', 'hey', 'dear', 'thanks', 'thank you'),
+    'Personal Pronouns': ('i', 'you', 'we', 'they', 'me', 'us'),
+    'Question Words': ('what', 'when', 'where', 'why', 'how', 'who'),
+    'Casual Language': ('ok', 'yeah', 'sure', 'maybe', 'probably'),
+}
+# Smaller indicator set reported by src.analysis.analyze_message
+CORE_SPAM_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    'Free/Freebie': ('free',),
+    'Win/Prize': ('win', 'won', 'prize'),
+    'Urgent': ('urgent',),
+    'Click': ('click',),
+}
+IMPERATIVE_VERBS = {
+    "click", "buy", "claim", "order", "register", "subscribe", "act", "call",
+    "reply", "send", "verify", "confirm", "update", "unsubscribe", "open",
+}
+URGENCY_WORDS = {
+    "urgent", "immediately", "asap", "now", "limited", "hurry", "expire",
+    "expires", "deadline", "last chance", "act now", "don't wait", "limited time",
+    "only today", "final notice", "instant", "quick", "rush", "emergency",
+}
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _keyword_regex(keyword: str) -> str:
+    """Regex for one keyword with word boundaries on its word-character edges."""
+    prefix = keyword.endswith("*")
+    stem = keyword[:-1] if prefix else keyword
+    left = r"\b" if re.match(r"\w", stem) else ""
+    if prefix:
+        return left + re.escape(stem) + r"\w*"
+    right = r"\b" if re.match(r"\w", stem[-1]) else ""
+    return left + re.escape(stem) + right
+
+
+class KeywordMatcher:
+    """Find which of a set of keywords occur in a text.
+
+    Single-word keywords, the vast majority, are matched with one \\w+
+    tokenization of the text and a set intersection, so the cost does not
+    grow with the number of keywords. Phrases, prefixes and symbols get a
+    compiled regex each, run only when a substring test says they can match.
+    Results are identical to searching for every keyword separately.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: FrozenSet[str] = frozenset(k.lower() for k in keywords)
+        self._words = frozenset(k for k in self.keywords if _WORD_RE.fullmatch(k))
+        self._others: List[Tuple[str, str, re.Pattern]] = [
+            (k, k.rstrip("*"), re.compile(_keyword_regex(k), re.IGNORECASE))
+            for k in sorted(self.keywords - self._words)
+        ]
+
+    def find(self, text: str) -> Set[str]:
+        """Keywords (as given, lowercased) occurring anywhere in text."""
+        lower = text.lower()
+        hits = set(self._words.intersection(_WORD_RE.findall(lower)))
+        for keyword, literal, regex in self._others:
+            if literal in lower and regex.search(text):
+                hits.add(keyword)
+        return hits
+
+
+def _all_keywords() -> Set[str]:
+    words = set(IMPERATIVE_VERBS) | set(URGENCY_WORDS)
+    for table in (SPAM_PATTERNS, HAM_PATTERNS, CORE_SPAM_PATTERNS):
+        for keywords in table.values():
+            words.update(keywords)
+    return words
+
+
+MESSAGE_KEYWORDS = KeywordMatcher(_all_keywords())
+
+
+@lru_cache(maxsize=32)
+def find_keywords(text: str) -> FrozenSet[str]:
+    """Every known keyword in a message (one scan, cached for recent texts)."""
+    return frozenset(MESSAGE_KEYWORDS.find(text))
+
+
+def pattern_flags(patterns: Dict[str, Tuple[str, ...]], hits: FrozenSet[str]) -> Dict[str, bool]:
+    """Label -> whether any of its keywords is in hits."""
+    return {label: any(k in hits for k in keywords) for label, keywords in patterns.items()}
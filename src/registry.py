@@ -0,0 +1,139 @@
+"""
+In-memory model registry with hot-swap.
+
+Holds every loaded model keyed by name. get(name) returns an immutable
+LoadedModel snapshot (vectorizer, classifier and a version derived from
+the files' size and mtime). When the files on disk change, the next get()
+after check_interval seconds loads the new version and swaps it in
+atomically; requests already holding the previous snapshot finish on it,
+and other callers keep getting the previous snapshot while the new one
+loads. A failed reload (e.g. a half-copied pickle, or a pair caught
+between save_model's renames) keeps the current version in service; the
+same files are not retried until one of them changes again. save_model
+replaces the pair checksum file last, so a publish always ends with a
+change that makes the next check load the complete pair.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.model import list_available_models, load_model, model_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 2.0
+
+
+class LoadedModel(NamedTuple):
+    """One loaded version of a model."""
+    name: str
+    version: str
+    tfidf: Any
+    model: Any
+    loaded_at: float
+
+
+class ModelRegistry:
+    """Thread-safe cache of loaded models that reloads them when their files change."""
+
+    def __init__(
+        self,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        loader: Callable[[str], Tuple[Any, Any]] = load_model,
+        versioner: Callable[[str], str] = model_version,
+    ):
+        self.check_interval = check_interval
+        self._loader = loader
+        self._versioner = versioner
+        self._models: Dict[str, LoadedModel] = {}
+        self._checked_at: Dict[str, float] = {}
+        # Version whose reload failed, so it is not retried until the files change again
+        self._failed: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._registry_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _load(self, name: str) -> LoadedModel:
+        version = self._versioner(name)
+        tfidf, model = self._loader(name)
+        if self._versioner(name) != version:
+            raise RuntimeError(f"Model {name!r} changed on disk while loading")
+        return LoadedModel(name, version, tfidf, model, time.time())
+
+    def get(self, name: str = "default") -> LoadedModel:
+        """Current snapshot of a model, loading or hot-swapping it as needed.
+
+        The first load of a name blocks and raises if the model cannot be
+        loaded; later reload failures are logged and the current version
+        keeps serving.
+        """
+        current = self._models.get(name)
+        now = time.monotonic()
+        if current is not None and now - self._checked_at.get(name, 0.0) < self.check_interval:
+            return current
+
+        lock = self._lock_for(name)
+        if current is not None:
+            # Someone else is already checking/reloading: serve what we have
+            if not lock.acquire(blocking=False):
+                return current
+        else:
+            lock.acquire()
+        try:
+            current = self._models.get(name)
+            if current is not None:
+                self._checked_at[name] = time.monotonic()
+                try:
+                    on_disk = self._versioner(name)
+                except OSError as e:
+                    logger.warning("Keeping model %r version %s; model files unreadable: %s", name, current.version, e)
+                    return current
+                if on_disk in (current.version, self._failed.get(name)):
+                    return current
+                try:
+                    fresh = self._load(name)
+                except Exception as e:
+                    self._failed[name] = on_disk
+                    logger.warning("Keeping model %r version %s; reload failed: %s", name, current.version, e)
+                    return current
+                logger.info("Model %r reloaded: %s -> %s", name, current.version, fresh.version)
+            else:
+                fresh = self._load(name)
+                logger.info("Model %r loaded: version %s", name, fresh.version)
+            self._models[name] = fresh
+            self._checked_at[name] = time.monotonic()
+            self._failed.pop(name, None)
+            return fresh
+        finally:
+            lock.release()
+
+    def reload(self, name: str = "default") -> LoadedModel:
+        """Load a model from disk now and swap it in, whatever its version."""
+        with self._lock_for(name):
+            fresh = self._load(name)
+            self._models[name] = fresh
+            self._checked_at[name] = time.monotonic()
+        return fresh
+
+    def evict(self, name: str):
+        """Drop a model from memory; the next get() loads it again."""
+        with self._lock_for(name):
+            self._models.pop(name, None)
+            self._checked_at.pop(name, None)
+
+    def loaded(self) -> Dict[str, str]:
+        """Name -> version of every model currently in memory."""
+        return {name: m.version for name, m in list(self._models.items())}
+
+    def available(self) -> List[str]:
+        """Model names present in the Models directory."""
+        return list_available_models()
+
+
+def static_model(tfidf, model, name: str = "default", version: Optional[str] = None) -> LoadedModel:
+    """Wrap estimators that did not come from disk as a LoadedModel."""
+    return LoadedModel(name, version or "unversioned", tfidf, model, time.time())
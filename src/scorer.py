@@ -0,0 +1,247 @@
+"""
+Fast scorer for the TF-IDF + linear/MultinomialNB models.
+
+At inference time the shipped pipeline is a sparse dot product:
+TF-IDF weights a message's term counts, and the spam log-odds are that
+vector dotted with a per-feature weight difference plus a bias. FastScorer
+holds only those arrays (vocabulary, idf, weight difference, bias), so it
+scores token lists in plain NumPy without sklearn's input validation and
+without importing sklearn at all.
+"""
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# TfidfVectorizer's default token pattern
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+# strip_accents modes FastScorer reproduces
+STRIP_ACCENTS = (None, "ascii", "unicode")
+
+
+def _strip_accents(text: str, mode: Optional[str]) -> str:
+    """Remove accents like TfidfVectorizer's strip_accents="ascii"/"unicode"."""
+    if mode is None:
+        return text
+    if mode == "ascii":
+        return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def unsupported_settings(tfidf) -> List[str]:
+    """Vectorizer settings whose transform FastScorer does not reproduce."""
+    unsupported = []
+    if getattr(tfidf, "analyzer", "word") != "word":
+        unsupported.append("analyzer")
+    if tuple(getattr(tfidf, "ngram_range", (1, 1))) != (1, 1):
+        unsupported.append("ngram_range")
+    if getattr(tfidf, "input", "content") != "content":
+        unsupported.append("input")
+    for name in ("preprocessor", "tokenizer", "stop_words"):
+        if getattr(tfidf, name, None) is not None:
+            unsupported.append(name)
+    if getattr(tfidf, "strip_accents", None) not in STRIP_ACCENTS:
+        unsupported.append("strip_accents")
+    if np.dtype(getattr(tfidf, "dtype", np.float64)) != np.float64:
+        unsupported.append("dtype")
+    return unsupported
+
+
+# Linear models whose predict_proba is sigmoid(x . coef + intercept)
+SIGMOID_PROBA_MODELS = ("LogisticRegression", "LogisticRegressionCV")
+SIGMOID_SGD_LOSSES = ("log_loss", "log")
+
+
+def _is_a(model, class_name: str) -> bool:
+    # By name, so this module never imports sklearn
+    return any(cls.__name__ == class_name for cls in type(model).__mro__)
+
+
+def _sigmoid_proba(model) -> bool:
+    """True if the model's spam probability is the sigmoid of its decision function."""
+    if not hasattr(model, "predict_proba"):
+        return True  # src.model squashes decision_function the same way
+    if any(_is_a(model, name) for name in SIGMOID_PROBA_MODELS):
+        return True
+    return _is_a(model, "SGDClassifier") and getattr(model, "loss", None) in SIGMOID_SGD_LOSSES
+
+
+def linear_weights(model) -> Optional[Tuple[np.ndarray, float]]:
+    """Return (weight_diff, bias) such that spam log-odds = x . weight_diff + bias.
+
+    Supports MultinomialNB and linear models exposing coef_/intercept_
+    whose probability is the sigmoid of their decision function
+    (LogisticRegression, log-loss SGDClassifier, and LinearSVC and other
+    models without predict_proba). Returns None for anything else,
+    including BernoulliNB and ComplementNB, whose probabilities are not a
+    weight difference over the TF-IDF values.
+    """
+    # Linear models
+    if hasattr(model, "coef_"):
+        if not _sigmoid_proba(model):
+            return None
+        coef = getattr(model, "coef_")
+        intercept = np.atleast_1d(getattr(model, "intercept_", np.zeros(2)))
+        if coef is not None and coef.ndim == 2:
+            if coef.shape[0] == 1:
+                return np.asarray(coef[0], dtype=np.float64), float(intercept[0])
+            if coef.shape[0] == 2:
+                return (
+                    np.asarray(coef[1] - coef[0], dtype=np.float64),
+                    float(intercept[1] - intercept[0]),
+                )
+        return None
+    # MultinomialNB
+    if _is_a(model, "MultinomialNB") and hasattr(model, "feature_log_prob_") and hasattr(model, "classes_"):
+        flp = getattr(model, "feature_log_prob_")  # (n_classes, n_features)
+        prior = getattr(model, "class_log_prior_", np.zeros(flp.shape[0]))
+        classes = list(getattr(model, "classes_"))
+        try:
+            spam_idx = classes.index(1)
+            ham_idx = classes.index(0)
+        except ValueError:
+            spam_idx, ham_idx = 1, 0
+        return (
+            np.asarray(flp[spam_idx] - flp[ham_idx], dtype=np.float64),
+            float(prior[spam_idx] - prior[ham_idx]),
+        )
+    return None
+
+
+class FastScorer:
+    """Score messages against a compiled TF-IDF + linear model.
+
+    Build one with FastScorer.from_estimators(tfidf, model) from the loaded
+    pickles. Probabilities are returned in [ham, spam] order like
+    src.model.predict.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        idf: Optional[np.ndarray],
+        weight_diff: np.ndarray,
+        bias: float,
+        sublinear_tf: bool = False,
+        norm: Optional[str] = "l2",
+        lowercase: bool = True,
+        token_pattern: str = DEFAULT_TOKEN_PATTERN,
+        binary: bool = False,
+        strip_accents: Optional[str] = None,
+    ):
+        if strip_accents not in STRIP_ACCENTS:
+            raise ValueError(f"Unknown strip_accents {strip_accents!r}; expected one of {STRIP_ACCENTS}")
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weight_diff = weight_diff
+        self.bias = float(bias)
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self.binary = binary
+        self.strip_accents = strip_accents
+        self._token_re = re.compile(token_pattern)
+
+    @classmethod
+    def from_estimators(cls, tfidf, model) -> "FastScorer":
+        """Compile a fitted TfidfVectorizer and classifier into a FastScorer."""
+        weights = linear_weights(model)
+        if weights is None:
+            raise ValueError(
+                f"{type(model).__name__} has no linear weights; FastScorer supports "
+                "MultinomialNB and sigmoid-probability linear models only"
+            )
+        if not hasattr(tfidf, "vocabulary_"):
+            raise ValueError(f"FastScorer needs a vocabulary-based TfidfVectorizer, not {type(tfidf).__name__}")
+        unsupported = unsupported_settings(tfidf)
+        if unsupported:
+            raise ValueError(
+                "FastScorer cannot reproduce this vectorizer's transform; "
+                f"unsupported settings: {', '.join(unsupported)}"
+            )
+        weight_diff, bias = weights
+        idf = np.asarray(tfidf.idf_, dtype=np.float64) if getattr(tfidf, "use_idf", True) else None
+        return cls(
+            vocabulary={str(k): int(v) for k, v in tfidf.vocabulary_.items()},
+            idf=idf,
+            weight_diff=weight_diff,
+            bias=bias,
+            sublinear_tf=bool(getattr(tfidf, "sublinear_tf", False)),
+            norm=getattr(tfidf, "norm", "l2"),
+            lowercase=bool(getattr(tfidf, "lowercase", True)),
+            token_pattern=getattr(tfidf, "token_pattern", None) or DEFAULT_TOKEN_PATTERN,
+            binary=bool(getattr(tfidf, "binary", False)),
+            strip_accents=getattr(tfidf, "strip_accents", None),
+        )
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split a preprocessed string exactly like the vectorizer's analyzer."""
+        if self.lowercase:
+            text = text.lower()
+        text = _strip_accents(text, self.strip_accents)
+        return self._token_re.findall(text)
+
+    def vectorize(self, tokens: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (feature_ids, tfidf_values) for the in-vocabulary tokens (as from tokenize)."""
+        counts: Dict[int, int] = {}
+        vocab = self.vocabulary
+        for tok in tokens:
+            idx = vocab.get(tok)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        ids = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        if self.binary:
+            values = np.ones(len(counts), dtype=np.float64)
+        else:
+            values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.idf is not None:
+            values *= self.idf[ids]
+        if self.norm == "l2":
+            values /= math.sqrt(float(values @ values))
+        elif self.norm == "l1":
+            values /= float(np.abs(values).sum())
+        return ids, values
+
+    def spam_logit(self, tokens: Iterable[str]) -> float:
+        """Spam log-odds for a token list."""
+        ids, values = self.vectorize(tokens)
+        return float(values @ self.weight_diff[ids]) + self.bias
+
+    def predict_proba(self, tokens: Iterable[str]) -> np.ndarray:
+        """[ham, spam] probabilities for a token list."""
+        logit = self.spam_logit(tokens)
+        # Numerically stable sigmoid
+        if logit >= 0:
+            spam_p = 1.0 / (1.0 + math.exp(-logit))
+        else:
+            z = math.exp(logit)
+            spam_p = z / (1.0 + z)
+        return np.array([1.0 - spam_p, spam_p])
+
+    def predict(self, tokens: Iterable[str], threshold: float = 0.5) -> Tuple[int, np.ndarray]:
+        """Return (prediction, [ham, spam] proba) for a token list."""
+        proba = self.predict_proba(tokens)
+        return int(proba[1] > threshold), proba
+
+    def predict_text(self, text: str, threshold: float = 0.5) -> Tuple[int, np.ndarray]:
+        """Score a preprocessed string (output of transformed_text)."""
+        return self.predict(self.tokenize(text), threshold)
+
+    def predict_proba_many(self, token_lists: Sequence[Iterable[str]]) -> np.ndarray:
+        """(n, 2) [ham, spam] probability matrix for several token lists."""
+        logits = np.fromiter(
+            (self.spam_logit(tokens) for tokens in token_lists),
+            dtype=np.float64,
+            count=len(token_lists),
+        )
+        spam_p = 1 / (1 + np.exp(-logits))
+        return np.column_stack([1 - spam_p, spam_p])
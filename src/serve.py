@@ -0,0 +1,448 @@
+"""
+Headless HTTP scoring service.
+
+Serves JSON predictions next to the Streamlit UI, using only the standard
+library. The model comes from a ModelRegistry, so replacing its pickles
+under Models/ hot-swaps it without a restart; every result reports the
+model_version that scored it. Run with:
+
+    python -m src.serve --port 8000
+
+Endpoints:
+  GET  /health         -> {"status": "ok", "model": "default", "model_version": "..."}
+  GET  /metrics        -> micro-batcher and result-cache counters
+  POST /predict        {"text": "...", "explain": false, "threshold": 0.5}
+  POST /predict_batch  {"texts": ["...", ...], "explain": false, "threshold": 0.5}
+  POST /analyze        {"text": "...", "explain": false, "threshold": 0.5}
+                       -> full per-message analysis (stats, URLs, keywords, ...)
+  POST /feedback       {"text": "...", "label": "spam", "source": "analyst"}
+                       -> appended to the feedback log (with --feedback-log)
+
+ScoringService holds the request logic and can be driven directly as a
+test client via ScoringService.handle(method, path, body).
+"""
+import argparse
+import hashlib
+import json
+import logging
+import pickle
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.batcher import MicroBatcher, QueueFullError
+from src.cache import DEFAULT_CACHE_SIZE, ResultCache, score_with_cache
+from src.context import MessageContext
+from src.feedback import FeedbackStore, parse_label
+from src.model import DEFAULT_THRESHOLD, explain_batch, score_vectors, vectorize_tokens
+from src.nlp import TOKENIZERS, get_stopwords, preprocess_tokens, setup_nltk
+from src.registry import DEFAULT_CHECK_INTERVAL, LoadedModel, ModelRegistry, static_model
+
+logger = logging.getLogger(__name__)
+
+# Same per-message cap as the Streamlit home page
+MAX_INPUT_CHARS = 50_000
+MAX_BATCH_SIZE = 1_000
+MAX_BODY_BYTES = MAX_BATCH_SIZE * MAX_INPUT_CHARS
+
+LABELS = {0: "ham", 1: "spam"}
+
+
+def _estimator_version(tfidf, model) -> str:
+    """Version tag for estimators passed in directly, derived from the objects themselves.
+
+    Files on disk under the model's name may hold a different model, so
+    they are not consulted.
+    """
+    try:
+        data = pickle.dumps((tfidf, model), protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # Unpicklable estimators: unique per served object, never shared
+        return f"unversioned-{id(model):x}"
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def _build_cache(size: int, path: Optional[str]) -> Optional[ResultCache]:
+    """Result cache for --cache-size/--cache-path; size 0 with a path is sqlite only."""
+    if size <= 0 and not path:
+        return None
+    return ResultCache(max(size, 0), path)
+
+
+class RequestError(ValueError):
+    """Invalid request payload; reported to the client as HTTP 400."""
+
+
+class ScoringService:
+    """Score messages with the registry's current version of a model.
+
+    Each request takes one model snapshot and uses it throughout, so a
+    hot-swap never mixes versions within a request. Estimators passed in
+    directly are served as a fixed, never-reloaded model.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "default",
+        tokenizer: str = "nltk",
+        stop_words: Optional[Set[str]] = None,
+        tfidf=None,
+        model=None,
+        batch_window_ms: float = 0.0,
+        max_batch_size: int = 64,
+        cache: Optional[ResultCache] = None,
+        registry: Optional[ModelRegistry] = None,
+        feedback: Optional[FeedbackStore] = None,
+    ):
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer {tokenizer!r}; expected one of {TOKENIZERS}")
+        self.model_name = model_name
+        self.tokenizer = tokenizer
+        self.registry: Optional[ModelRegistry] = None
+        self._fixed: Optional[LoadedModel] = None
+        if tfidf is not None and model is not None:
+            self._fixed = static_model(tfidf, model, model_name, _estimator_version(tfidf, model))
+        else:
+            self.registry = registry if registry is not None else ModelRegistry()
+            self.registry.get(model_name)  # fail fast if the model cannot load
+        self.stop_words = stop_words if stop_words is not None else get_stopwords()
+        # Repeated bodies are served from the result cache when one is given
+        self.cache = cache
+        # Analyst labels for src.feedback apply; /feedback is off without a store
+        self.feedback = feedback
+        # Micro-batch concurrent /predict calls into one model call
+        self.batcher: Optional[MicroBatcher] = None
+        if batch_window_ms > 0:
+            self.batcher = MicroBatcher(
+                self._score_tokens,
+                max_batch_size=max_batch_size,
+                max_wait_ms=batch_window_ms,
+                name="predict-batcher",
+            )
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def current_model(self) -> LoadedModel:
+        """Model snapshot to use for one request."""
+        if self._fixed is not None:
+            return self._fixed
+        return self.registry.get(self.model_name)
+
+    @property
+    def tfidf(self):
+        return self.current_model().tfidf
+
+    @property
+    def model(self):
+        return self.current_model().model
+
+    def _namespace(self, snapshot: LoadedModel) -> str:
+        # Results are cached per model version, so a reload never serves stale scores
+        return f"{self.model_name}:{snapshot.version}:{self.tokenizer}"
+
+    def _tokenize(self, texts: List[str]) -> List[List[str]]:
+        return [
+            preprocess_tokens(t, stop_words=self.stop_words, tokenizer=self.tokenizer)
+            for t in texts
+        ]
+
+    def _score_tokens(self, items: List[Tuple[LoadedModel, List[str]]]) -> List[np.ndarray]:
+        """[ham, spam] probabilities for (snapshot, preprocessed tokens) items.
+
+        One model call per snapshot; a batch only spans two versions while a
+        reload is being swapped in.
+        """
+        groups: Dict[int, List[int]] = {}
+        for i, (snapshot, _) in enumerate(items):
+            groups.setdefault(id(snapshot), []).append(i)
+        out: List[np.ndarray] = [None] * len(items)
+        for indices in groups.values():
+            snapshot = items[indices[0]][0]
+            vectors = vectorize_tokens([items[i][1] for i in indices], snapshot.tfidf)
+            _, probas = score_vectors(vectors, snapshot.model)
+            for i, proba in zip(indices, probas):
+                out[i] = proba
+        return out
+
+    def _compute(
+        self, texts: List[str], explain: bool, snapshot: LoadedModel, batched: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Cacheable result entries ([ham, spam] probabilities, explanation)."""
+        token_lists = self._tokenize(texts)
+        vectors = None
+        if batched:
+            # Preprocess in the request thread; only the model call is batched
+            probas = [self.batcher.score((snapshot, t)) for t in token_lists]
+        else:
+            vectors = vectorize_tokens(token_lists, snapshot.tfidf)
+            _, probas = score_vectors(vectors, snapshot.model)
+        explanations = None
+        if explain:
+            if vectors is None:
+                vectors = vectorize_tokens(token_lists, snapshot.tfidf)
+            explanations = explain_batch(vectors, snapshot.tfidf, snapshot.model, top_k=8)
+        entries = []
+        for i, proba in enumerate(probas):
+            entry: Dict[str, Any] = {"probabilities": [float(proba[0]), float(proba[1])]}
+            if explanations is not None:
+                entry["explanation"] = explanations[i]
+            entries.append(entry)
+        return entries
+
+    def _result(self, entry: Dict[str, Any], explain: bool, threshold: float, version: str) -> Dict[str, Any]:
+        ham, spam = entry["probabilities"]
+        pred = int(spam > threshold)
+        result: Dict[str, Any] = {
+            "label": LABELS[pred],
+            "prediction": pred,
+            "probabilities": {"ham": ham, "spam": spam},
+            "confidence": spam if pred else ham,
+            "model_version": version,
+        }
+        if explain:
+            result["explanation"] = entry["explanation"]
+        return result
+
+    def score(
+        self,
+        texts: List[str],
+        explain: bool = False,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> List[Dict[str, Any]]:
+        """Score raw messages in one vectorized pass and build result dicts."""
+        if not texts:
+            return []
+        snapshot = self.current_model()
+        entries = score_with_cache(
+            texts, lambda batch: self._compute(batch, explain, snapshot),
+            self.cache, self._namespace(snapshot), explain,
+        )
+        return [self._result(e, explain, threshold, snapshot.version) for e in entries]
+
+    def score_one(
+        self,
+        text: str,
+        explain: bool = False,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> Dict[str, Any]:
+        """Score one message, through the micro-batcher when enabled."""
+        if self.batcher is None:
+            return self.score([text], explain, threshold)[0]
+        snapshot = self.current_model()
+        entry = score_with_cache(
+            [text], lambda batch: self._compute(batch, explain, snapshot, batched=True),
+            self.cache, self._namespace(snapshot), explain,
+        )[0]
+        return self._result(entry, explain, threshold, snapshot.version)
+
+    def analyze(
+        self,
+        text: str,
+        explain: bool = False,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> Dict[str, Any]:
+        """Full MessageContext analysis of one message as JSON-ready data."""
+        snapshot = self.current_model()
+        ctx = MessageContext.build(
+            text, snapshot.tfidf, snapshot.model,
+            stop_words=self.stop_words, threshold=threshold, tokenizer=self.tokenizer,
+        )
+        result = ctx.to_dict(explain_top_k=8 if explain else None)
+        result["model_version"] = snapshot.version
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Service counters, including micro-batcher queue metrics when enabled."""
+        return {
+            "model": self.model_name,
+            "model_version": self.current_model().version,
+            "models_loaded": self.registry.loaded() if self.registry is not None else None,
+            "batcher": self.batcher.stats() if self.batcher is not None else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    # ------------------------------------------------------------------
+    # Request handling (transport independent)
+    # ------------------------------------------------------------------
+    def handle(self, method: str, path: str, body: bytes = b"") -> Tuple[int, Dict[str, Any]]:
+        """Dispatch one request. Returns (HTTP status, JSON-serializable payload)."""
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        try:
+            if method == "GET" and path == "/health":
+                return HTTPStatus.OK, {
+                    "status": "ok", "model": self.model_name, "model_version": self.current_model().version,
+                }
+            if method == "GET" and path == "/metrics":
+                return HTTPStatus.OK, self.metrics()
+            if method == "POST" and path == "/predict":
+                payload = _parse_json(body)
+                text = _validate_text(payload.get("text"))
+                return HTTPStatus.OK, self.score_one(text, **_score_options(payload))
+            if method == "POST" and path == "/predict_batch":
+                payload = _parse_json(body)
+                texts = payload.get("texts")
+                if not isinstance(texts, list):
+                    raise RequestError("'texts' must be a list of strings")
+                if len(texts) > MAX_BATCH_SIZE:
+                    raise RequestError(f"At most {MAX_BATCH_SIZE} texts per batch")
+                texts = [_validate_text(t) for t in texts]
+                results = self.score(texts, **_score_options(payload))
+                return HTTPStatus.OK, {"results": results, "count": len(results)}
+            if method == "POST" and path == "/analyze":
+                payload = _parse_json(body)
+                text = _validate_text(payload.get("text"))
+                return HTTPStatus.OK, self.analyze(text, **_score_options(payload))
+            if method == "POST" and path == "/feedback":
+                if self.feedback is None:
+                    return HTTPStatus.NOT_FOUND, {"error": "Feedback is not enabled on this server"}
+                payload = _parse_json(body)
+                text = _validate_text(payload.get("text"))
+                try:
+                    label = parse_label(payload.get("label"))
+                except ValueError as e:
+                    raise RequestError(str(e))
+                source = payload.get("source")
+                self.feedback.add(text, label, source=str(source) if source is not None else None)
+                return HTTPStatus.OK, {"accepted": True, "label": LABELS[label]}
+            if path in ("/health", "/metrics", "/predict", "/predict_batch", "/analyze", "/feedback"):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} not allowed on {path}"}
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {path}"}
+        except RequestError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except QueueFullError as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}
+        except Exception:
+            logger.exception("Error scoring request")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+
+def _parse_json(body: bytes) -> Dict[str, Any]:
+    try:
+        payload = json.loads(body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RequestError(f"Invalid JSON body: {e}")
+    if not isinstance(payload, dict):
+        raise RequestError("JSON body must be an object")
+    return payload
+
+
+def _validate_text(text: Any) -> str:
+    if not isinstance(text, str):
+        raise RequestError("'text' must be a string")
+    if len(text) > MAX_INPUT_CHARS:
+        raise RequestError(f"Message exceeds {MAX_INPUT_CHARS:,} characters")
+    return text
+
+
+def _score_options(payload: Dict[str, Any]) -> Dict[str, Any]:
+    threshold = payload.get("threshold", DEFAULT_THRESHOLD)
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1:
+        raise RequestError("'threshold' must be a number between 0 and 1")
+    return {"explain": bool(payload.get("explain", False)), "threshold": float(threshold)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Thin HTTP adapter over ScoringService."""
+
+    service: ScoringService  # set by make_server
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be delimited, so the connection cannot be reused
+            self._send(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length header"})
+            self.close_connection = True
+            return
+        if length > MAX_BODY_BYTES:
+            self._send(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"})
+            self.close_connection = True
+            return
+        body = self.rfile.read(length) if length else b""
+        status, payload = self.service.handle(method, self.path, body)
+        self._send(status, payload)
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service: ScoringService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """Build a threaded HTTP server bound to service. Port 0 picks a free port."""
+    handler = type("ScoringHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve spam predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default="default", help="Model name passed to load_model")
+    parser.add_argument("--tokenizer", choices=TOKENIZERS, default="nltk")
+    parser.add_argument("--batch-window-ms", type=float, default=0.0,
+                        help="Collect concurrent /predict calls for up to this long (0 disables)")
+    parser.add_argument("--max-batch-size", type=int, default=64,
+                        help="Largest micro-batch scored in one model call")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="Results kept in the in-memory cache (0 disables it; --cache-path still applies)")
+    parser.add_argument("--cache-path", help="sqlite file for a result cache that survives restarts")
+    parser.add_argument("--reload-interval", type=float, default=DEFAULT_CHECK_INTERVAL,
+                        help="Seconds between checks of the model files for changes")
+    parser.add_argument("--feedback-log", metavar="PATH",
+                        help="Accept POST /feedback labels into this JSON Lines log")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    setup_nltk(punkt=args.tokenizer == "nltk")
+    service = ScoringService(
+        model_name=args.model,
+        tokenizer=args.tokenizer,
+        batch_window_ms=args.batch_window_ms,
+        max_batch_size=args.max_batch_size,
+        cache=_build_cache(args.cache_size, args.cache_path),
+        registry=ModelRegistry(check_interval=args.reload_interval),
+        feedback=FeedbackStore(args.feedback_log) if args.feedback_log else None,
+    )
+    server = make_server(service, args.host, args.port)
+    logger.info("Serving model %r on http://%s:%d", args.model, *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
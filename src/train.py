@@ -0,0 +1,361 @@
+"""
+Reproducible, headless training pipeline.
+
+Replaces Notebooks/preprocessing.ipynb and Notebooks/Model_Building.ipynb
+with one command:
+
+    python -m src.train --workers 0 --publish default
+
+Steps, with the same settings the notebooks used for Models/model.pkl:
+  1. stream the labelled CSV (Data/raw/spam.csv: v1 label, v2 text,
+     cp1252) and drop repeated (label, text) rows
+  2. preprocess with transformed_text chunk by chunk as rows are read,
+     across processes with --workers; messages already in the
+     preprocessed-corpus cache (src.corpus) are not preprocessed again
+  3. fit TfidfVectorizer(max_features=3000) on every row, split 80/20
+     (random_state=2) and fit MultinomialNB on the training part;
+     --vectorizer hashing uses HashingTfidfVectorizer (src.hashing)
+     instead, with no vocabulary and a fixed --n-features columns
+  4. write the model as {name}-{UTC timestamp} (Models/model_{...}.pkl,
+     vectorizer_{...}.pkl), its metrics as Models/model_{...}.json and,
+     with --artifacts, the pickle-free artifacts
+
+--publish NAME also writes the trained model as model NAME, which a
+running server on --model NAME hot-swaps to; with --artifacts its
+artifacts are re-exported under that name too. --parity scores the new
+model and the default one on the held-out split of
+Data/preprocessed/transform_data.csv and stores both in the metrics.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from src.corpus import CorpusCache
+from src.feedback import parse_label
+from src.hashing import DEFAULT_N_FEATURES, HashingTfidfVectorizer
+from src.ingest import chunked
+from src.model import load_model, model_metadata_path, save_model
+from src.nlp import PARALLEL_MIN_BATCH, TOKENIZERS, PreprocessPool, get_stopwords, setup_nltk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA = Path(__file__).resolve().parent.parent / "Data" / "raw" / "spam.csv"
+DEFAULT_PARITY_DATA = Path(__file__).resolve().parent.parent / "Data" / "preprocessed" / "transform_data.csv"
+DEFAULT_ENCODING = "cp1252"
+DEFAULT_MAX_FEATURES = 3000
+DEFAULT_TEST_SIZE = 0.2
+DEFAULT_RANDOM_STATE = 2
+VECTORIZERS = ("tfidf", "hashing")
+
+
+def iter_labelled(
+    path: Union[str, Path],
+    text_column: str = "v2",
+    label_column: str = "v1",
+    encoding: str = DEFAULT_ENCODING,
+) -> Iterator[Tuple[str, int]]:
+    """Stream (text, 0/1 label) rows from a CSV, skipping repeated rows."""
+    seen: Set[bytes] = set()
+    with open(path, newline="", encoding=encoding, errors="replace") as f:
+        reader = csv.DictReader(f)
+        missing = {text_column, label_column} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Columns {sorted(missing)} not found in {path}; available: {reader.fieldnames}")
+        for n, row in enumerate(reader, 2):
+            text = row[text_column] or ""
+            try:
+                label = parse_label(row[label_column])
+            except ValueError as e:
+                raise ValueError(f"{path}:{n}: {e}")
+            key = hashlib.blake2b(f"{label}\0{text}".encode("utf-8", "surrogatepass"), digest_size=16).digest()
+            if key in seen:
+                continue
+            seen.add(key)
+            yield text, label
+
+
+def build_vectorizer(kind: str = "tfidf", max_features: int = DEFAULT_MAX_FEATURES, n_features: int = DEFAULT_N_FEATURES):
+    """Unfitted vectorizer for --vectorizer: tfidf or hashing."""
+    if kind == "tfidf":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        return TfidfVectorizer(max_features=max_features)
+    if kind == "hashing":
+        return HashingTfidfVectorizer(n_features=n_features)
+    raise ValueError(f"Unknown vectorizer {kind!r}; choose from {', '.join(VECTORIZERS)}")
+
+
+def _classification_metrics(y_true, y_pred) -> Dict[str, Any]:
+    from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
+
+    return {
+        "rows": len(y_true),
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
+        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=[0, 1]).tolist(),
+    }
+
+
+def parity_report(
+    tfidf,
+    model,
+    reference: str = "default",
+    data: Union[str, Path] = DEFAULT_PARITY_DATA,
+    test_size: float = DEFAULT_TEST_SIZE,
+    random_state: int = DEFAULT_RANDOM_STATE,
+) -> Dict[str, Any]:
+    """Score a model and a reference model on the same held-out rows.
+
+    Uses the stored transformed_text of the preprocessed CSV the reference
+    model was built from, split as the notebooks split it, so both models
+    see identical input and the reference model only its own test rows.
+    """
+    from sklearn.model_selection import train_test_split
+
+    texts: List[str] = []
+    labels: List[int] = []
+    with open(data, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.DictReader(f):
+            texts.append(row["transformed_text"] or "")
+            labels.append(parse_label(row["target"]))
+    if not texts:
+        raise ValueError(f"No rows in {data}")
+    _, test_texts, _, y_test = train_test_split(texts, labels, test_size=test_size, random_state=random_state)
+    ref_tfidf, ref_model = load_model(reference)
+    ref_pred = ref_model.predict(ref_tfidf.transform(test_texts))
+    pred = model.predict(tfidf.transform(test_texts))
+    ours = _classification_metrics(y_test, pred)
+    theirs = _classification_metrics(y_test, ref_pred)
+    return {
+        "data": str(data),
+        "reference": reference,
+        "model": ours,
+        "reference_model": theirs,
+        "accuracy_delta": ours["accuracy"] - theirs["accuracy"],
+        "precision_delta": ours["precision"] - theirs["precision"],
+        "agreement": float(np.mean(pred == ref_pred)),
+    }
+
+
+def _file_sha256(path: Union[str, Path]) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def train(
+    data: Union[str, Path] = DEFAULT_DATA,
+    text_column: str = "v2",
+    label_column: str = "v1",
+    encoding: str = DEFAULT_ENCODING,
+    stop_words: Optional[Set[str]] = None,
+    tokenizer: str = "nltk",
+    workers: int = 1,
+    chunk_size: int = 5000,
+    max_features: int = DEFAULT_MAX_FEATURES,
+    test_size: float = DEFAULT_TEST_SIZE,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    alpha: Optional[float] = None,
+    corpus_cache: Optional[CorpusCache] = None,
+    vectorizer: str = "tfidf",
+    n_features: int = DEFAULT_N_FEATURES,
+) -> Tuple[Any, Any, Dict[str, Any]]:
+    """Preprocess, vectorize and fit. Returns (tfidf, model, metrics).
+
+    corpus_cache, when given, must use the same stop words and tokenizer;
+    new preprocessing results are written back to it. alpha defaults to
+    1.0 for tfidf and to max_features / n_features for hashing, which
+    keeps the total smoothing mass of a max_features vocabulary; with
+    alpha=1.0 the mostly empty hashed columns drown the real counts.
+    """
+    if alpha is None:
+        alpha = 1.0 if vectorizer == "tfidf" else max_features / n_features
+    from sklearn.model_selection import train_test_split
+    from sklearn.naive_bayes import MultinomialNB
+
+    tfidf = build_vectorizer(vectorizer, max_features=max_features, n_features=n_features)
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    transformed: List[str] = []
+    labels: List[int] = []
+    with PreprocessPool(workers, stop_words, tokenizer) as pool:
+        for chunk in chunked(iter_labelled(data, text_column, label_column, encoding), chunk_size):
+            texts = [text for text, _ in chunk]
+            if corpus_cache is not None:
+                transformed.extend(corpus_cache.transform(texts, pool))
+            else:
+                transformed.extend(pool.transform(texts))
+            labels.extend(label for _, label in chunk)
+            logger.info("Preprocessed %d messages", len(transformed))
+    if not transformed:
+        raise ValueError(f"No labelled rows in {data}")
+    if corpus_cache is not None:
+        corpus_cache.flush()
+    y = np.asarray(labels)
+    timings["preprocess"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    X = tfidf.fit_transform(transformed)
+    timings["vectorize"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    model = MultinomialNB(alpha=alpha)
+    model.fit(X_train, y_train)
+    timings["fit"] = time.perf_counter() - t
+
+    y_pred = model.predict(X_test)
+    timings["total"] = time.perf_counter() - start
+    metrics: Dict[str, Any] = {
+        "data": {
+            "path": str(data),
+            "sha256": _file_sha256(data),
+            "rows": len(y),
+            "spam": int(y.sum()),
+            "ham": int(len(y) - y.sum()),
+        },
+        "params": {
+            "tokenizer": tokenizer,
+            "vectorizer": vectorizer,
+            "max_features": max_features if vectorizer == "tfidf" else None,
+            "n_features": n_features if vectorizer == "hashing" else None,
+            "test_size": test_size,
+            "random_state": random_state,
+            "alpha": alpha,
+        },
+        "test": _classification_metrics(y_test, y_pred),
+        "corpus_cache": corpus_cache.stats() if corpus_cache is not None else None,
+        "train_rows": len(y_train),
+        "n_features": X.shape[1],
+        "timings_s": {k: round(v, 3) for k, v in timings.items()},
+    }
+    return tfidf, model, metrics
+
+
+def save_trained(
+    tfidf,
+    model,
+    metrics: Dict[str, Any],
+    name: str = "trained",
+    publish: Optional[str] = None,
+    artifacts: bool = False,
+) -> str:
+    """Write a trained model under a timestamped name. Returns that name."""
+    import sklearn
+
+    created = datetime.now(timezone.utc)
+    versioned = f"{name}-{created:%Y%m%d-%H%M%S}"
+    save_model(tfidf, model, versioned)
+    metadata = {
+        "name": versioned,
+        "created_at": created.isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        **metrics,
+    }
+    if artifacts:
+        from src.artifacts import artifact_dir, export_artifacts
+
+        metadata["artifacts"] = str(export_artifacts(tfidf, model, artifact_dir(versioned)).parent)
+    with open(model_metadata_path(versioned), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    if publish:
+        save_model(tfidf, model, publish)
+        if artifacts:
+            # Keep Models/artifacts/{publish} scoring like the published pickles
+            export_artifacts(tfidf, model, artifact_dir(publish))
+    return versioned
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.train", description="Train the TF-IDF + Naive Bayes model.")
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA, help="Labelled CSV (default: Data/raw/spam.csv)")
+    parser.add_argument("--text-column", default="v2")
+    parser.add_argument("--label-column", default="v1", help="Column holding spam/ham (or 1/0) labels")
+    parser.add_argument("--encoding", default=DEFAULT_ENCODING)
+    parser.add_argument("--tokenizer", choices=TOKENIZERS, default="nltk")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Preprocessing processes (0 = one per CPU); chunks below "
+                             f"{PARALLEL_MIN_BATCH:,} messages stay in-process")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Messages read and preprocessed per chunk")
+    parser.add_argument("--vectorizer", choices=VECTORIZERS, default="tfidf",
+                        help="tfidf: vocabulary of --max-features terms; hashing: --n-features hashed columns")
+    parser.add_argument("--max-features", type=int, default=DEFAULT_MAX_FEATURES)
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Columns for --vectorizer hashing")
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument("--random-state", type=int, default=DEFAULT_RANDOM_STATE)
+    parser.add_argument("--alpha", type=float,
+                        help="MultinomialNB smoothing (default: 1.0; max-features/n-features for hashing)")
+    parser.add_argument("--name", default="trained", help="Model name prefix; output is {name}-{timestamp}")
+    parser.add_argument("--publish", metavar="NAME", help="Also write the trained model as model NAME")
+    parser.add_argument("--artifacts", action="store_true", help="Also export pickle-free artifacts")
+    parser.add_argument("--parity", metavar="MODEL", nargs="?", const="default",
+                        help="Compare against MODEL (default: default) on Data/preprocessed/transform_data.csv")
+    parser.add_argument("--no-corpus-cache", action="store_true",
+                        help="Preprocess every message instead of reusing Data/preprocessed/cache")
+    args = parser.parse_args(argv)
+    if args.artifacts and args.vectorizer == "hashing":
+        parser.error("--artifacts needs a vocabulary; it is not available with --vectorizer hashing")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        setup_nltk(punkt=args.tokenizer == "nltk")
+        stop_words = get_stopwords()
+        tfidf, model, metrics = train(
+            args.data,
+            text_column=args.text_column,
+            label_column=args.label_column,
+            encoding=args.encoding,
+            stop_words=stop_words,
+            tokenizer=args.tokenizer,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_features=args.max_features,
+            test_size=args.test_size,
+            random_state=args.random_state,
+            alpha=args.alpha,
+            corpus_cache=None if args.no_corpus_cache else CorpusCache(stop_words, args.tokenizer),
+            vectorizer=args.vectorizer,
+            n_features=args.n_features,
+        )
+        if args.parity:
+            metrics["parity"] = parity_report(
+                tfidf, model, args.parity, test_size=args.test_size, random_state=args.random_state,
+            )
+        name = save_trained(tfidf, model, metrics, args.name, publish=args.publish, artifacts=args.artifacts)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    test = metrics["test"]
+    logger.info(
+        "Model %s: accuracy %.4f, precision %.4f, recall %.4f on %d test rows (%.2fs)",
+        name, test["accuracy"], test["precision"], test["recall"], test["rows"], metrics["timings_s"]["total"],
+    )
+    parity = metrics.get("parity")
+    if parity:
+        logger.info(
+            "Parity vs %s on %d rows: accuracy %.4f vs %.4f, precision %.4f vs %.4f, agreement %.4f",
+            parity["reference"], parity["model"]["rows"],
+            parity["model"]["accuracy"], parity["reference_model"]["accuracy"],
+            parity["model"]["precision"], parity["reference_model"]["precision"], parity["agreement"],
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
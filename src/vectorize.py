@@ -0,0 +1,192 @@
+"""
+Token-id vectorization.
+
+transformed_text joins the stemmed tokens with spaces, and
+TfidfVectorizer.transform then re-tokenizes that string with its regex
+before looking each term up in the vocabulary. TokenVectorizer skips that
+round trip: it maps each preprocessing token straight to its column ids
+(memoized per distinct token) and builds the sparse TF-IDF rows from
+those ids with the vectorizer's own idf weights and normalization.
+
+With sklearn's default token_pattern the word analyzer never matches
+across whitespace, so analysing a message token by token yields exactly
+the terms that analysing the joined string does; the rows equal
+tfidf.transform's for the same text. Works with fitted TfidfVectorizer
+(default token_pattern, unigram word analyzer) and
+HashingTfidfVectorizer models; other settings that the row builder does
+not reproduce (another token_pattern, binary counts, a custom
+preprocessor or tokenizer, a non-float64 dtype, ...) raise ValueError,
+and src.model falls back to tfidf.transform for them.
+
+    python -m src.vectorize --model default   # parity check on transform_data.csv
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+from src.scorer import DEFAULT_TOKEN_PATTERN, unsupported_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA = Path(__file__).resolve().parent.parent / "Data" / "preprocessed" / "transform_data.csv"
+
+# Distinct tokens whose column ids are memoized; like the stem cache, a
+# bounded memo covers almost every token of a Zipfian message stream
+TERM_CACHE_SIZE = 65_536
+
+
+class TokenVectorizer:
+    """TF-IDF rows from preprocessed token lists for one fitted vectorizer.
+
+    Build one with TokenVectorizer.from_vectorizer(tfidf). transform()
+    takes token lists (e.g. from nlp.preprocess_tokens, or a transformed
+    string's .split()) and returns the same CSR matrix as
+    tfidf.transform on the space-joined strings.
+    """
+
+    def __init__(
+        self,
+        tfidf,
+        analyzer: Callable[[str], List[str]],
+        lookup: Callable[[str], Optional[int]],
+        n_features: int,
+        max_cached: int = TERM_CACHE_SIZE,
+    ):
+        self.tfidf = tfidf
+        self.n_features = n_features
+        self.max_cached = max_cached
+        self._analyzer = analyzer
+        self._lookup = lookup
+        self._ids: Dict[str, Tuple[int, ...]] = {}
+
+    @classmethod
+    def from_vectorizer(cls, tfidf) -> "TokenVectorizer":
+        """Compile a fitted TfidfVectorizer or HashingTfidfVectorizer."""
+        if hasattr(tfidf, "vocabulary_"):
+            # The vectorizer's own analyzer applies stop words per token
+            unsupported = [name for name in unsupported_settings(tfidf) if name != "stop_words"]
+            if getattr(tfidf, "binary", False):
+                unsupported.append("binary")
+            # Token-by-token analysis only equals the joined string's for a
+            # pattern that never spans whitespace; the default is the one we trust
+            if getattr(tfidf, "tokenizer", None) is None and tfidf.token_pattern != DEFAULT_TOKEN_PATTERN:
+                unsupported.append("token_pattern")
+            if unsupported:
+                raise ValueError(
+                    "TokenVectorizer cannot reproduce this vectorizer's transform; "
+                    f"unsupported settings: {', '.join(unsupported)}"
+                )
+            vocabulary = tfidf.vocabulary_
+            return cls(tfidf, tfidf.build_analyzer(), vocabulary.get, len(vocabulary))
+        if hasattr(tfidf, "column"):
+            return cls(tfidf, tfidf.build_analyzer(), tfidf.column, tfidf.n_features)
+        raise ValueError(f"TokenVectorizer cannot compile {type(tfidf).__name__}")
+
+    def term_ids(self, token: str) -> Tuple[int, ...]:
+        """Column ids of the terms the vectorizer's analyzer finds in one token."""
+        ids = self._ids.get(token)
+        if ids is None:
+            lookup = self._lookup
+            ids = tuple(i for i in map(lookup, self._analyzer(token)) if i is not None)
+            if len(self._ids) < self.max_cached:
+                self._ids[token] = ids
+        return ids
+
+    def counts(self, token_lists: Sequence[Iterable[str]]) -> csr_matrix:
+        """Sparse (n, n_features) term-count matrix with sorted column indices."""
+        memo = self._ids
+        term_ids = self.term_ids
+        indices: List[int] = []
+        indptr = [0]
+        for tokens in token_lists:
+            for token in tokens:
+                ids = memo.get(token)
+                indices.extend(term_ids(token) if ids is None else ids)
+            indptr.append(len(indices))
+        X = csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+            shape=(len(indptr) - 1, self.n_features),
+        )
+        X.sum_duplicates()
+        return X
+
+    def transform(self, token_lists: Sequence[Iterable[str]]) -> csr_matrix:
+        """TF-IDF matrix for token lists, as tfidf.transform on the joined strings."""
+        X = self.counts(token_lists)
+        tfidf = self.tfidf
+        if getattr(tfidf, "sublinear_tf", False):
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if getattr(tfidf, "use_idf", True):
+            # Read at call time: HashingTfidfVectorizer.partial_fit updates it in place
+            X.data *= tfidf.idf_[X.indices]
+        norm = getattr(tfidf, "norm", "l2")
+        if norm is not None:
+            X = normalize(X, norm=norm, copy=False)
+        return X
+
+
+def check_parity(tfidf, texts: Sequence[str], tolerance: float = 1e-12, show: int = 5) -> Dict[str, Any]:
+    """Compare TokenVectorizer rows with tfidf.transform for preprocessed texts."""
+    expected = tfidf.transform(texts).tocsr()
+    actual = TokenVectorizer.from_vectorizer(tfidf).transform([t.split() for t in texts])
+    expected.sort_indices()
+    mismatches = []
+    for i in range(len(texts)):
+        a, e = actual[i], expected[i]
+        if not np.array_equal(a.indices, e.indices) or np.abs(a.data - e.data).max(initial=0.0) > tolerance:
+            mismatches.append(i)
+    diff = abs(actual - expected)
+    return {
+        "rows": len(texts),
+        "nonzeros": int(expected.nnz),
+        "mismatches": len(mismatches),
+        "max_abs_diff": float(diff.max()) if diff.nnz else 0.0,
+        "examples": [texts[i] for i in mismatches[:show]],
+    }
+
+
+def _read_column(path: Union[str, Path], column: str) -> List[str]:
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.DictReader(f)
+        if column not in (reader.fieldnames or []):
+            raise ValueError(f"Column {column!r} not found in {path}; available: {reader.fieldnames}")
+        return [row[column] or "" for row in reader]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.vectorize", description="Check token-id vectorization against tfidf.transform."
+    )
+    parser.add_argument("path", type=Path, nargs="?", default=DEFAULT_DATA,
+                        help="CSV of preprocessed messages (default: Data/preprocessed/transform_data.csv)")
+    parser.add_argument("--column", default="transformed_text")
+    parser.add_argument("--model", default="default", help="Model name passed to load_model")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        from src.model import load_model
+
+        tfidf, _ = load_model(args.model)
+        report = check_parity(tfidf, _read_column(args.path, args.column))
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -537,10 +537,12 @@ def wordcloud_figure(
 def annotated_message_html(
     raw_text: str,
     spam_words: Optional[set] = None,
-    ham_words: Optional[set] = None
+    ham_words: Optional[set] = None,
+    tokens: Optional[List[str]] = None
 ) -> str:
     """
     Premium HTML annotation with glassmorphic badges and gradient highlights.
+    tokens: the text already split into word/punctuation/whitespace runs.
     """
     import html
     import re
@@ -582,7 +584,8 @@ def annotated_message_html(
             ">{html.escape(tok)}</span>'''
         return html.escape(tok)
 
-    tokens = re.findall(r"\w+|[^\w\s]+|\s+", raw_text)
+    if tokens is None:
+        tokens = re.findall(r"\w+|[^\w\s]+|\s+", raw_text)
     highlighted = "".join(
         _wrap_token(t) if t.strip() and re.match(r"\w+", t) else html.escape(t)
         for t in tokens
@@ -0,0 +1,40 @@
+"""Shared fixtures: the shipped corpus and default model."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+TRANSFORM_DATA = ROOT / "Data" / "preprocessed" / "transform_data.csv"
+
+
+@pytest.fixture(scope="session")
+def transform_data() -> pd.DataFrame:
+    """Data/preprocessed/transform_data.csv with empty texts as ""."""
+    df = pd.read_csv(TRANSFORM_DATA)
+    df["text"] = df["text"].fillna("")
+    df["transformed_text"] = df["transformed_text"].fillna("")
+    return df
+
+
+@pytest.fixture(scope="session")
+def preprocessed_texts(transform_data):
+    """The transformed_text column the shipped vectorizer was fitted on."""
+    return transform_data["transformed_text"].tolist()
+
+
+@pytest.fixture(scope="session")
+def default_model():
+    """(tfidf, model) loaded from Models/vectorizer.pkl and Models/model.pkl."""
+    from src.model import load_model
+
+    return load_model("default")
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Empty directory standing in for Models/."""
+    from src import model as model_module
+
+    monkeypatch.setattr(model_module, "_model_dir", lambda: tmp_path)
+    return tmp_path
@@ -0,0 +1,50 @@
+"""Process-wide resources in app.py are shared, not copied per rerun."""
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def _session_script():
+    import streamlit as st
+
+    import app
+
+    st.session_state["resources"] = (
+        app._model_registry(),
+        app._cached_get_stopwords(),
+        app._cached_word_lists(),
+    )
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    import src.nlp
+
+    # The NLTK corpus may be missing here; sharing does not depend on its contents
+    monkeypatch.setattr(src.nlp, "get_stopwords", lambda: {"the", "a"})
+
+    def run():
+        at = AppTest.from_function(_session_script)
+        at.run()
+        assert not at.exception
+        return at
+
+    return run
+
+
+def test_resources_are_shared_across_reruns_and_sessions(sessions):
+    first = sessions()
+    registry, stop_words, word_lists = first.session_state["resources"]
+    first.run()
+    rerun = first.session_state["resources"]
+    other = sessions().session_state["resources"]
+    for resources in (rerun, other):
+        assert resources[0] is registry
+        assert resources[1] is stop_words
+        assert resources[2] is word_lists
+
+
+def test_shared_resources_are_immutable(sessions):
+    _, stop_words, (spam_words, ham_words) = sessions().session_state["resources"]
+    assert isinstance(stop_words, frozenset)
+    assert isinstance(spam_words, frozenset) and isinstance(ham_words, frozenset)
+    assert spam_words and ham_words
@@ -0,0 +1,72 @@
+"""Pickle-free artifact export and loading."""
+import json
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import BernoulliNB, ComplementNB, MultinomialNB
+
+from src.artifacts import MANIFEST, artifact_dir, export_artifacts, load_scorer
+
+
+def _fit(transform_data, **params):
+    tfidf = TfidfVectorizer(max_features=3000, **params)
+    model = MultinomialNB().fit(tfidf.fit_transform(transform_data["text"]), transform_data["target"])
+    return tfidf, model
+
+
+def test_shipped_artifacts_match_pickles(default_model, preprocessed_texts):
+    tfidf, model = default_model
+    scorer = load_scorer(artifact_dir("default"))
+    expected = model.predict_proba(tfidf.transform(preprocessed_texts))
+    actual = scorer.predict_proba_many([scorer.tokenize(t) for t in preprocessed_texts])
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("params", [{"binary": True}, {"strip_accents": "unicode", "sublinear_tf": True}])
+def test_round_trip_keeps_vectorizer_settings(tmp_path, transform_data, params):
+    tfidf, model = _fit(transform_data, **params)
+    export_artifacts(tfidf, model, tmp_path)
+    manifest = json.loads((tmp_path / MANIFEST).read_text())
+    for name, value in params.items():
+        assert manifest[name] == value
+
+    texts = transform_data["text"].tolist()
+    scorer = load_scorer(tmp_path)
+    expected = model.predict_proba(tfidf.transform(texts))
+    np.testing.assert_allclose(scorer.predict_proba_many([scorer.tokenize(t) for t in texts]), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("params", [{"stop_words": "english"}, {"dtype": np.float32}])
+def test_export_refuses_unsupported_settings(tmp_path, transform_data, params):
+    tfidf, model = _fit(transform_data, **params)
+    with pytest.raises(ValueError, match="unsupported settings"):
+        export_artifacts(tfidf, model, tmp_path)
+    assert not (tmp_path / MANIFEST).exists()
+
+
+@pytest.mark.parametrize("classifier", [BernoulliNB, ComplementNB])
+def test_export_refuses_models_without_linear_weights(tmp_path, transform_data, classifier):
+    tfidf = TfidfVectorizer(max_features=3000)
+    model = classifier().fit(tfidf.fit_transform(transform_data["text"]), transform_data["target"])
+    with pytest.raises(ValueError, match="no linear weights"):
+        export_artifacts(tfidf, model, tmp_path)
+    assert not (tmp_path / MANIFEST).exists()
+
+
+def test_load_refuses_unsupported_manifest(tmp_path, default_model):
+    export_artifacts(*default_model, tmp_path)
+    manifest = json.loads((tmp_path / MANIFEST).read_text())
+    manifest["tokenizer"] = "custom"
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="tokenizer"):
+        load_scorer(tmp_path)
+
+
+def test_load_refuses_old_format(tmp_path, default_model):
+    export_artifacts(*default_model, tmp_path)
+    manifest = json.loads((tmp_path / MANIFEST).read_text())
+    manifest["format_version"] = 1
+    (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="format version"):
+        load_scorer(tmp_path)
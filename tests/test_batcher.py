@@ -0,0 +1,88 @@
+"""Micro-batching queue in src.batcher."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.batcher import _STOP, MicroBatcher, QueueFullError
+
+
+class Recorder:
+    """Batch function that records each call and can be held open."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def __call__(self, items):
+        self.calls.append(list(items))
+        self.entered.set()
+        self.release.wait(10)
+        if self.fail:
+            raise ValueError("model exploded")
+        return [item * 10 for item in items]
+
+
+def test_concurrent_submits_share_one_batch():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=8, max_wait_ms=500)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: batcher.score(i, timeout=10), range(8)))
+    batcher.close()
+    assert results == [i * 10 for i in range(8)]
+    assert len(fn.calls) == 1 and sorted(fn.calls[0]) == list(range(8))
+    stats = batcher.stats()
+    assert (stats["batches"], stats["items"], stats["largest_batch"]) == (1, 8, 8)
+
+
+def test_batch_exception_reaches_every_caller():
+    fn = Recorder(fail=True)
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=500)
+    futures = [batcher.submit(i) for i in range(4)]
+    for future in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            future.result(10)
+    assert len(fn.calls) == 1
+    batcher.close()
+
+
+def test_full_queue_raises():
+    fn = Recorder()
+    fn.release.clear()
+    batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    running = batcher.submit(1)
+    assert fn.entered.wait(10)
+    queued = batcher.submit(2)
+    with pytest.raises(QueueFullError):
+        batcher.submit(3)
+    fn.release.set()
+    assert (running.result(10), queued.result(10)) == (10, 20)
+    batcher.close()
+
+
+def test_close_drains_queued_items():
+    fn = Recorder()
+    fn.release.clear()
+    batcher = MicroBatcher(fn, max_batch_size=2, max_wait_ms=0)
+    futures = [batcher.submit(i) for i in range(5)]
+    assert fn.entered.wait(10)
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    fn.release.set()
+    closer.join(10)
+    assert [f.result(0) for f in futures] == [0, 10, 20, 30, 40]
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(5)
+
+
+def test_close_fails_items_behind_the_stop_marker():
+    batcher = MicroBatcher(Recorder(), max_batch_size=2, max_wait_ms=0)
+    batcher._queue.put(_STOP)
+    # An item that passed submit()'s closed check just as close() ran
+    late = batcher.submit(7)
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        late.result(10)
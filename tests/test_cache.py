@@ -0,0 +1,97 @@
+"""Result cache in src.cache."""
+import copy
+
+import pytest
+
+from src.cache import ResultCache, cache_key, score_with_cache
+from src.serve import ScoringService
+
+
+class Counter:
+    """compute() for score_with_cache that records the texts it scored."""
+
+    def __init__(self, spam: float = 0.25):
+        self.calls = []
+        self.spam = spam
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [{"probabilities": [1 - self.spam, self.spam], "explanation": {"text": t}} for t in texts]
+
+
+def _entry(spam):
+    return {"probabilities": [1 - spam, spam]}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", _entry(0.1))
+    cache.put("b", _entry(0.2))
+    assert cache.get("a") == _entry(0.1)  # "b" is now the oldest
+    cache.put("c", _entry(0.3))
+    assert cache.get("b") is None
+    assert cache.get("a") == _entry(0.1) and cache.get("c") == _entry(0.3)
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 3, 1)
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = tmp_path / "results.sqlite"
+    first = ResultCache(max_entries=10, path=path)
+    first.put_many({"a": _entry(0.1), "b": _entry(0.9)})
+    first.close()
+
+    second = ResultCache(max_entries=10, path=path)
+    assert second.get_many(["a", "b", "c"]) == [_entry(0.1), _entry(0.9), None]
+    stats = second.stats()
+    assert (stats["disk_hits"], stats["entries"]) == (2, 2)
+    second.close()
+
+
+def test_entry_without_explanation_is_recomputed_for_explain():
+    cache = ResultCache(max_entries=10)
+    cache.put(cache_key("free prize"), _entry(0.9))
+    compute = Counter()
+    entries = score_with_cache(["free prize"], compute, cache)
+    assert entries == [_entry(0.9)] and compute.calls == []
+
+    entries = score_with_cache(["free prize"], compute, cache, explain=True)
+    assert compute.calls == [["free prize"]]
+    assert entries[0]["explanation"] == {"text": "free prize"}
+    assert score_with_cache(["free prize"], compute, cache, explain=True) == entries
+    assert len(compute.calls) == 1
+
+
+def test_namespace_change_is_not_served_stale_scores():
+    cache = ResultCache(max_entries=10)
+    old, new = Counter(spam=0.1), Counter(spam=0.8)
+    score_with_cache(["win cash"], old, cache, namespace="default:v1:nltk")
+    entry = score_with_cache(["win cash"], new, cache, namespace="default:v2:nltk")[0]
+    assert entry["probabilities"][1] == 0.8 and new.calls == [["win cash"]]
+
+
+def test_model_change_in_service_is_not_served_stale_scores(default_model):
+    tfidf, model = default_model
+    cache = ResultCache(max_entries=10)
+    text = "free prize call now"
+    first = ScoringService(tfidf=tfidf, model=model, tokenizer="regex", stop_words=set(), cache=cache)
+    other = copy.deepcopy(model)
+    other.class_log_prior_ = other.class_log_prior_[::-1].copy()
+    second = ScoringService(tfidf=tfidf, model=other, tokenizer="regex", stop_words=set(), cache=cache)
+
+    before = first.score([text])[0]
+    after = second.score([text])[0]
+    assert before["model_version"] != after["model_version"]
+    assert after["probabilities"]["spam"] == pytest.approx(other.predict_proba(tfidf.transform([text]))[0][1])
+    assert after["probabilities"]["spam"] != pytest.approx(before["probabilities"]["spam"])
+    assert first.score([text])[0] == before
+
+
+def test_duplicate_texts_are_computed_once():
+    cache = ResultCache(max_entries=10)
+    compute = Counter()
+    texts = ["free prize", "Free  PRIZE", "see you", "free prize"]
+    entries = score_with_cache(texts, compute, cache)
+    assert compute.calls == [["free prize", "see you"]]
+    assert entries[0] == entries[1] == entries[3]
+    assert entries[2]["explanation"] == {"text": "see you"}
@@ -0,0 +1,58 @@
+"""Preprocessed-corpus cache in src.corpus."""
+from concurrent.futures import ProcessPoolExecutor
+
+from src.corpus import CorpusCache
+from src.nlp import transformed_text
+
+STOP_WORDS = {"the", "a", "to"}
+
+
+def _cache(root):
+    return CorpusCache(stop_words=STOP_WORDS, tokenizer="regex", root=root)
+
+
+def _expected(texts):
+    return [transformed_text(t, stop_words=STOP_WORDS, tokenizer="regex") for t in texts]
+
+
+def _fill(root, texts):
+    cache = _cache(root)
+    for text in texts:
+        cache.transform([text])
+        cache.flush()
+    return len(texts)
+
+
+def test_round_trip(tmp_path, transform_data):
+    texts = transform_data["text"].tolist()[:300]
+    cache = _cache(tmp_path)
+    assert cache.transform(texts) == _expected(texts)
+    assert cache.flush() == len(set(texts))
+
+    reloaded = _cache(tmp_path)
+    assert reloaded.transform(texts) == _expected(texts)
+    assert reloaded.misses == 0
+
+
+def test_writers_loaded_before_each_other_flush(tmp_path, transform_data):
+    texts = transform_data["text"].tolist()[:200]
+    first, second = _cache(tmp_path), _cache(tmp_path)
+    first.transform(texts[:120])
+    second.transform(texts[80:])
+    first.flush()
+    second.flush()
+
+    reloaded = _cache(tmp_path)
+    assert reloaded.transform(texts) == _expected(texts)
+    assert reloaded.misses == 0
+
+
+def test_concurrent_processes(tmp_path, transform_data):
+    texts = list(dict.fromkeys(transform_data["text"].tolist()))[:240]
+    shards = [texts[i::4] for i in range(4)]
+    with ProcessPoolExecutor(4) as pool:
+        assert sum(pool.map(_fill, [tmp_path] * 4, shards)) == len(texts)
+
+    reloaded = _cache(tmp_path)
+    assert reloaded.transform(texts) == _expected(texts)
+    assert reloaded.misses == 0
@@ -0,0 +1,27 @@
+"""Feedback checkpoints and publishing in src.feedback."""
+import numpy as np
+from sklearn.naive_bayes import MultinomialNB
+
+from src.feedback import FeedbackStore, apply_feedback
+from src.hashing import HashingTfidfVectorizer
+from src.model import load_model, model_pair_path, save_model
+
+
+def test_publish_writes_the_checkpoint_pair(models_dir, preprocessed_texts, transform_data):
+    tfidf = HashingTfidfVectorizer(n_features=2 ** 12)
+    model = MultinomialNB().fit(tfidf.fit_transform(preprocessed_texts), transform_data["target"])
+    save_model(tfidf, model, "demo")
+
+    store = FeedbackStore(models_dir / "feedback.jsonl")
+    store.add("URGENT brandnewword claim your reward now", "spam")
+    store.add("see you at lunch tomorrow", "ham")
+    meta = apply_feedback(store, "demo", stop_words=set(), tokenizer="regex", publish="online")
+    assert meta["name"] == "demo-v1"
+
+    checkpoint_tfidf, checkpoint_model = load_model("demo-v1")
+    published_tfidf, published_model = load_model("online")
+    assert model_pair_path("online").read_text() == model_pair_path("demo-v1").read_text()
+    # Hashing models change both halves of the pair on every apply
+    assert not np.array_equal(published_tfidf.idf_, tfidf.idf_)
+    np.testing.assert_array_equal(published_tfidf.idf_, checkpoint_tfidf.idf_)
+    np.testing.assert_array_equal(published_model.feature_count_, checkpoint_model.feature_count_)
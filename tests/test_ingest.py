@@ -0,0 +1,16 @@
+"""CSV/TSV readers in src.ingest."""
+from src.ingest import detect_format, iter_messages
+
+
+def test_tsv_uses_tab_delimiter(tmp_path):
+    path = tmp_path / "messages.tsv"
+    path.write_text("id\ttext\na1\tWin a prize, now\na2\tsee you at 5\n", encoding="utf-8")
+    assert detect_format(path) == "csv"
+    messages = list(iter_messages(path, id_column="id"))
+    assert [(m["id"], m["text"]) for m in messages] == [("a1", "Win a prize, now"), ("a2", "see you at 5")]
+
+
+def test_csv_keeps_comma_delimiter(tmp_path):
+    path = tmp_path / "messages.csv"
+    path.write_text('text,label\n"Win a prize, now",spam\n', encoding="utf-8")
+    assert [m["text"] for m in iter_messages(path)] == ["Win a prize, now"]
@@ -0,0 +1,119 @@
+"""Regex tokenizer mode: equivalence with the NLTK pipeline and speed."""
+import os
+import time
+
+import nltk
+import numpy as np
+import pandas as pd
+import pytest
+from nltk.corpus import stopwords
+
+from src.nlp import fast_tokenize, transformed_text
+from tests.conftest import ROOT
+
+# Share of messages whose regex-mode output must match the NLTK pipeline's.
+# Punkt's learned abbreviations ("ok.", "mr.", "pa.") account for most of
+# the rest; 5,104 of 5,169 strings and 5,113 TF-IDF rows matched when added.
+MIN_AGREEMENT = 0.98
+
+
+@pytest.fixture(scope="module")
+def stop_words():
+    try:
+        return set(stopwords.words("english"))
+    except LookupError:
+        pytest.skip("NLTK stopwords not installed")
+
+
+@pytest.fixture(scope="module")
+def punkt():
+    try:
+        nltk.data.find("tokenizers/punkt_tab")
+    except LookupError:
+        pytest.skip("NLTK punkt_tab not installed")
+
+
+@pytest.fixture(scope="module")
+def raw_texts():
+    df = pd.read_csv(ROOT / "Data" / "raw" / "spam.csv", encoding="latin-1")
+    return df["v2"].fillna("").tolist()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("hello... world!!", ["hello", "world"]),
+    ("free entry in 2 a wkly comp", ["free", "entry", "in", "2", "a", "wkly", "comp"]),
+    ("call me at 5. ok", ["call", "me", "at", "ok"]),
+    ("u.s. e-mail 1,000 prizes", ["prizes"]),
+    ("i cannot go, gonna wait", ["i", "can", "not", "go", "gon", "na", "wait"]),
+    ("don't you're", ["do", "you"]),
+])
+def test_fast_tokenize(text, expected):
+    assert fast_tokenize(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "ok. I am a gentleman and will treat you with dignity and respect.",
+    "Ok. I asked for money how far",
+    "How's it feel? Mr. Your not my real Valentine just my yo Valentine even tho u hardly play!!",
+    "Goodnight, sleep well da please take care pa. Please.",
+])
+def test_known_divergence_punkt_abbreviations(transform_data, text):
+    # Punkt keeps "ok." / "mr." / "pa." whole, so isalnum drops them; the
+    # regex treats the period as a sentence end and keeps the word.
+    row = transform_data[transform_data["text"] == text].iloc[0]
+    abbreviation = text.lower().split(".")[0].split()[-1]
+    assert abbreviation in fast_tokenize(text.lower())
+    assert abbreviation not in row["transformed_text"].split()
+
+
+def test_regex_mode_matches_shipped_preprocessing(transform_data, default_model, stop_words):
+    tfidf, _ = default_model
+    expected = transform_data["transformed_text"].tolist()
+    actual = [transformed_text(t, stop_words=stop_words, tokenizer="regex") for t in transform_data["text"]]
+    assert np.mean([a == e for a, e in zip(actual, expected)]) >= MIN_AGREEMENT
+
+    a, e = tfidf.transform(actual), tfidf.transform(expected)
+    same_rows = np.asarray((abs(a - e) > 1e-12).sum(axis=1)).ravel() == 0
+    assert same_rows.mean() >= MIN_AGREEMENT
+
+
+def test_regex_mode_matches_nltk_mode(raw_texts, stop_words, punkt):
+    agree = [
+        transformed_text(t, stop_words=stop_words, tokenizer="regex")
+        == transformed_text(t, stop_words=stop_words, tokenizer="nltk")
+        for t in raw_texts
+    ]
+    assert np.mean(agree) >= MIN_AGREEMENT
+
+
+def _treebank_tokenize(text):
+    # word_tokenize without Punkt sentence splitting, then transformed_text's filter
+    return [w for w in nltk.word_tokenize(text, preserve_line=True) if w.isalnum()]
+
+
+def test_fast_tokenize_matches_treebank_without_sentence_breaks(raw_texts):
+    # Without periods Punkt has nothing to split, so the Treebank tokenizer
+    # alone is the reference; this needs no NLTK data downloads.
+    texts = [t.lower() for t in raw_texts if "." not in t]
+    agree = [fast_tokenize(t) == _treebank_tokenize(t) for t in texts]
+    assert np.mean(agree) >= 0.999
+
+
+def _best_of(fn, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run timing benchmarks")
+def test_fast_tokenize_benchmark(raw_texts):
+    # Treebank only (preserve_line skips Punkt), so this understates the
+    # full speedup; measured at ~8x versus ~12x with Punkt.
+    texts = [t.lower() for t in raw_texts]
+    regex = _best_of(fast_tokenize, texts)
+    treebank = _best_of(_treebank_tokenize, texts)
+    assert regex * 3 < treebank, f"fast_tokenize {regex:.3f}s vs word_tokenize {treebank:.3f}s"
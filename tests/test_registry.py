@@ -0,0 +1,44 @@
+"""Model publishing and hot-swap in src.registry."""
+import pickle
+
+import pytest
+
+from src.model import load_model, model_pair_path, save_model
+from src.registry import ModelRegistry
+
+
+def test_save_and_load_round_trip(models_dir):
+    save_model({"vocab": 1}, ["clf"], "demo")
+    assert model_pair_path("demo").is_file()
+    assert load_model("demo") == ({"vocab": 1}, ["clf"])
+
+
+def test_half_published_pair_is_refused(models_dir):
+    save_model({"vocab": 1}, ["old"], "demo")
+    # save_model's first rename has happened, the second has not
+    (models_dir / "vectorizer_demo.pkl").write_bytes(pickle.dumps({"vocab": 2, "retrained": True}))
+    with pytest.raises(ValueError, match="do not match"):
+        load_model("demo")
+
+
+def test_registry_swaps_only_complete_pairs(models_dir):
+    save_model({"vocab": 1}, ["old"], "demo")
+    registry = ModelRegistry(check_interval=0)
+    first = registry.get("demo")
+
+    new_tfidf, new_model = {"vocab": 2, "retrained": True}, ["new", "classifier"]
+    (models_dir / "vectorizer_demo.pkl").write_bytes(pickle.dumps(new_tfidf, protocol=pickle.HIGHEST_PROTOCOL))
+    assert registry.get("demo") is first
+    (models_dir / "model_demo.pkl").write_bytes(pickle.dumps(new_model, protocol=pickle.HIGHEST_PROTOCOL))
+    assert registry.get("demo") is first
+
+    save_model(new_tfidf, new_model, "demo")
+    swapped = registry.get("demo")
+    assert (swapped.tfidf, swapped.model) == (new_tfidf, new_model)
+    assert swapped.version != first.version
+
+
+def test_unpaired_pickles_still_load(models_dir):
+    (models_dir / "vectorizer.pkl").write_bytes(pickle.dumps("tfidf"))
+    (models_dir / "model.pkl").write_bytes(pickle.dumps("model"))
+    assert load_model() == ("tfidf", "model")
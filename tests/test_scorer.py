@@ -0,0 +1,104 @@
+"""FastScorer parity with the sklearn vectorizer + classifier."""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import BernoulliNB, ComplementNB, MultinomialNB
+from sklearn.svm import LinearSVC
+
+from src.model import explain_prediction, predict
+from src.scorer import FastScorer, linear_weights
+
+ACCENTED = [
+    "café crème brûlée offer",
+    "naïve résumé free entry",
+    "Ünïcödé ﬁnal call",
+]
+
+
+def _fast_proba(scorer, texts):
+    return scorer.predict_proba_many([scorer.tokenize(t) for t in texts])
+
+
+def test_default_model_parity(default_model, preprocessed_texts):
+    tfidf, model = default_model
+    scorer = FastScorer.from_estimators(tfidf, model)
+    expected = model.predict_proba(tfidf.transform(preprocessed_texts))
+    np.testing.assert_allclose(_fast_proba(scorer, preprocessed_texts), expected, rtol=0, atol=1e-12)
+
+
+def test_predict_text_matches_predict_proba(default_model, preprocessed_texts):
+    tfidf, model = default_model
+    scorer = FastScorer.from_estimators(tfidf, model)
+    for text in preprocessed_texts[:50]:
+        label, proba = scorer.predict_text(text)
+        np.testing.assert_allclose(proba, model.predict_proba(tfidf.transform([text]))[0], atol=1e-12)
+        assert label == int(proba[1] > 0.5)
+
+
+@pytest.mark.parametrize("params, classifier", [
+    ({"binary": True}, MultinomialNB),
+    ({"strip_accents": "unicode"}, MultinomialNB),
+    ({"strip_accents": "ascii", "lowercase": False}, MultinomialNB),
+    ({"sublinear_tf": True, "norm": "l1"}, LogisticRegression),
+    ({"use_idf": False, "norm": None}, MultinomialNB),
+])
+def test_vectorizer_settings_parity(transform_data, params, classifier):
+    texts = transform_data["text"].tolist() + ACCENTED
+    labels = transform_data["target"].tolist() + [1] * len(ACCENTED)
+    tfidf = TfidfVectorizer(max_features=3000, **params)
+    model = classifier().fit(tfidf.fit_transform(texts), labels)
+    scorer = FastScorer.from_estimators(tfidf, model)
+    expected = model.predict_proba(tfidf.transform(texts))
+    np.testing.assert_allclose(_fast_proba(scorer, texts), expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("params", [
+    {"tokenizer": str.split, "token_pattern": None},
+    {"preprocessor": str.upper},
+    {"stop_words": "english"},
+    {"strip_accents": lambda s: s},
+    {"ngram_range": (1, 2)},
+    {"dtype": np.float32},
+])
+def test_rejects_unreproducible_settings(preprocessed_texts, params):
+    tfidf = TfidfVectorizer(**params)
+    X = tfidf.fit_transform(preprocessed_texts[:200])
+    model = MultinomialNB().fit(X, [i % 2 for i in range(200)])
+    with pytest.raises(ValueError, match="unsupported settings"):
+        FastScorer.from_estimators(tfidf, model)
+
+
+@pytest.mark.parametrize("classifier", [LogisticRegression, lambda: SGDClassifier(loss="log_loss", random_state=0)])
+def test_sigmoid_linear_models_parity(transform_data, preprocessed_texts, classifier):
+    tfidf = TfidfVectorizer(max_features=3000)
+    model = classifier().fit(tfidf.fit_transform(preprocessed_texts), transform_data["target"])
+    scorer = FastScorer.from_estimators(tfidf, model)
+    expected = model.predict_proba(tfidf.transform(preprocessed_texts))
+    np.testing.assert_allclose(_fast_proba(scorer, preprocessed_texts), expected, rtol=0, atol=1e-9)
+
+
+def test_models_without_predict_proba_match_src_model(transform_data, preprocessed_texts):
+    tfidf = TfidfVectorizer(max_features=3000)
+    model = LinearSVC().fit(tfidf.fit_transform(preprocessed_texts), transform_data["target"])
+    scorer = FastScorer.from_estimators(tfidf, model)
+    for text in preprocessed_texts[:50]:
+        np.testing.assert_allclose(scorer.predict_text(text)[1], predict(text, tfidf, model)[1], atol=1e-9)
+
+
+@pytest.mark.parametrize("classifier", [
+    BernoulliNB,
+    ComplementNB,
+    lambda: SGDClassifier(loss="modified_huber", random_state=0),
+])
+def test_non_linear_probability_models_are_rejected(transform_data, preprocessed_texts, classifier):
+    tfidf = TfidfVectorizer(max_features=3000)
+    model = classifier().fit(tfidf.fit_transform(preprocessed_texts), transform_data["target"])
+    assert linear_weights(model) is None
+    with pytest.raises(ValueError, match="no linear weights"):
+        FastScorer.from_estimators(tfidf, model)
+
+    # src.model keeps scoring with the estimator itself
+    text = preprocessed_texts[2]
+    np.testing.assert_allclose(predict(text, tfidf, model)[1], model.predict_proba(tfidf.transform([text]))[0])
+    assert explain_prediction(text, tfidf, model) == {"positive": [], "negative": []}
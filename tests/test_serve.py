@@ -0,0 +1,135 @@
+"""Scoring service and HTTP adapter in src.serve."""
+import copy
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sklearn.naive_bayes import MultinomialNB
+
+from src.batcher import MicroBatcher
+from src.model import model_version, save_model
+from src.serve import MAX_BODY_BYTES, ScoringService, _build_cache, make_server
+
+
+@pytest.fixture(scope="module")
+def server(default_model):
+    tfidf, model = default_model
+    service = ScoringService(tfidf=tfidf, model=model, tokenizer="regex", stop_words=set())
+    httpd = make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def _post(address, content_length, body=b""):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    conn.putrequest("POST", "/predict")
+    conn.putheader("Content-Type", "application/json")
+    conn.putheader("Content-Length", content_length)
+    conn.endheaders(body)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+def test_valid_request(server):
+    body = json.dumps({"text": "free prize call now"}).encode()
+    status, payload = _post(server, str(len(body)), body)
+    assert status == 200
+    assert payload["label"] in ("ham", "spam")
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-5", "1.5"])
+def test_invalid_content_length_is_400(server, content_length):
+    status, payload = _post(server, content_length)
+    assert status == 400
+    assert "Content-Length" in payload["error"]
+
+
+def test_oversized_content_length_is_413(server):
+    status, _ = _post(server, str(MAX_BODY_BYTES + 1))
+    assert status == 413
+
+
+def test_injected_estimators_are_versioned_by_content(default_model, models_dir):
+    tfidf, model = default_model
+    # Files under the same name describe another model and must not be used
+    save_model(tfidf, MultinomialNB(alpha=0.5).fit(tfidf.transform(["free prize", "see you"]), [1, 0]), "default")
+    first = ScoringService(tfidf=tfidf, model=model, tokenizer="regex", stop_words=set())
+    again = ScoringService(tfidf=tfidf, model=model, tokenizer="regex", stop_words=set())
+    other = ScoringService(tfidf=tfidf, model=copy.deepcopy(model).set_params(alpha=0.5), tokenizer="regex",
+                           stop_words=set())
+    assert first.current_model().version == again.current_model().version
+    assert first.current_model().version not in (model_version("default"), other.current_model().version)
+
+
+def test_sqlite_only_cache(tmp_path):
+    assert _build_cache(0, None) is None
+    cache = _build_cache(0, str(tmp_path / "cache.sqlite"))
+    cache.put("key", {"probabilities": [0.9, 0.1]})
+    assert cache.stats()["entries"] == 0
+    assert cache.get("key") == {"probabilities": [0.9, 0.1]}
+    cache.close()
+
+
+@pytest.fixture
+def batched_service(default_model):
+    tfidf, model = default_model
+    service = ScoringService(tfidf=tfidf, model=model, tokenizer="regex", stop_words=set(), batch_window_ms=50,
+                             max_batch_size=16)
+    yield service
+    service.close()
+
+
+def _predict(service, text):
+    return service.handle("POST", "/predict", json.dumps({"text": text}).encode())
+
+
+def test_concurrent_predicts_are_batched(batched_service, default_model):
+    tfidf, model = default_model
+    texts = [f"free prize number {i} call now" for i in range(8)] + ["see you at lunch"] * 2
+    with ThreadPoolExecutor(len(texts)) as pool:
+        responses = list(pool.map(lambda t: _predict(batched_service, t), texts))
+    for text, (status, payload) in zip(texts, responses):
+        assert status == 200
+        expected = model.predict_proba(tfidf.transform([" ".join(text.split())]))[0][1]
+        assert payload["probabilities"]["spam"] == pytest.approx(expected)
+
+    status, metrics = batched_service.handle("GET", "/metrics")
+    assert status == 200
+    batcher = metrics["batcher"]
+    assert batcher["items"] == len(texts)
+    assert batcher["batches"] < len(texts)
+    assert batcher["largest_batch"] > 1
+    assert metrics["cache"] is None and metrics["model_version"] == batched_service.current_model().version
+
+
+def test_full_batch_queue_is_503(batched_service):
+    release = threading.Event()
+    entered = threading.Event()
+
+    def blocked(items):
+        entered.set()
+        release.wait(10)
+        return batched_service._score_tokens(items)
+
+    batched_service.batcher.close()
+    batched_service.batcher = MicroBatcher(blocked, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(_predict, batched_service, "free prize")
+        assert entered.wait(10)
+        second = pool.submit(_predict, batched_service, "call now")
+        while batched_service.batcher.stats()["queue_depth"] < 1:
+            time.sleep(0.001)
+        status, payload = _predict(batched_service, "win cash")
+        release.set()
+        assert status == 503
+        assert "queue is full" in payload["error"]
+        assert first.result(10)[0] == second.result(10)[0] == 200
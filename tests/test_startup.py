@@ -0,0 +1,45 @@
+"""Import-time budget for app.py (python -X importtime)."""
+import re
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import ROOT
+
+# Modules the About/Help/Contact pages must not pay for; the Home page
+# imports them on first render.
+DEFERRED = ("nltk", "sklearn", "scipy", "src.model", "src.pages.home")
+# Cumulative import time of app.py beyond streamlit itself, in seconds.
+# The deferred imports measured about 10 ms; pulling the ML stack back in
+# costs several hundred.
+BUDGET_S = 0.25
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+@pytest.fixture(scope="module")
+def importtime():
+    """{module: cumulative microseconds} for a fresh `import app`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            times[m.group(4)] = int(m.group(2))
+    return times
+
+
+@pytest.mark.parametrize("module", DEFERRED)
+def test_ml_stack_not_imported(importtime, module):
+    loaded = [name for name in importtime if name == module or name.startswith(module + ".")]
+    assert not loaded, f"import app loaded {loaded}"
+
+
+def test_import_time_budget(importtime):
+    own = (importtime["app"] - importtime.get("streamlit", 0)) / 1e6
+    assert own < BUDGET_S, f"import app took {own:.3f}s beyond streamlit (budget {BUDGET_S}s)"
@@ -0,0 +1,21 @@
+"""Saving trained models in src.train."""
+import numpy as np
+
+from src.artifacts import load_scorer
+from src.model import load_model
+from src.train import save_trained
+
+
+def test_publish_exports_artifacts_under_the_published_name(tmp_path, monkeypatch, models_dir, default_model,
+                                                           preprocessed_texts):
+    monkeypatch.setattr("src.artifacts.artifact_dir", lambda name="default": tmp_path / "artifacts" / name)
+    tfidf, model = default_model
+    versioned = save_trained(tfidf, model, {}, name="trained", publish="online", artifacts=True)
+
+    expected = model.predict_proba(tfidf.transform(preprocessed_texts))
+    for name in (versioned, "online"):
+        scorer = load_scorer(tmp_path / "artifacts" / name)
+        actual = scorer.predict_proba_many([scorer.tokenize(t) for t in preprocessed_texts])
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+    published_tfidf, _ = load_model("online")
+    assert published_tfidf.vocabulary_ == tfidf.vocabulary_
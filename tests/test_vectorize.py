@@ -0,0 +1,46 @@
+"""TokenVectorizer parity with tfidf.transform."""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.hashing import HashingTfidfVectorizer
+from src.model import vectorize_tokens
+from src.vectorize import TokenVectorizer, check_parity
+
+
+def test_shipped_vectorizer_parity(default_model, preprocessed_texts):
+    tfidf, _ = default_model
+    report = check_parity(tfidf, preprocessed_texts)
+    assert report["mismatches"] == 0
+    assert report["rows"] == len(preprocessed_texts)
+
+
+@pytest.mark.parametrize("vectorizer", [
+    TfidfVectorizer(max_features=3000, sublinear_tf=True, norm="l1"),
+    TfidfVectorizer(max_features=3000, use_idf=False, norm=None),
+    TfidfVectorizer(stop_words="english", strip_accents="unicode"),
+    HashingTfidfVectorizer(n_features=2 ** 12, sublinear_tf=True),
+])
+def test_vectorizer_settings_parity(preprocessed_texts, vectorizer):
+    tfidf = vectorizer.fit(preprocessed_texts)
+    assert check_parity(tfidf, preprocessed_texts)["mismatches"] == 0
+
+
+@pytest.mark.parametrize("params", [
+    {"binary": True},
+    {"dtype": np.float32},
+    {"tokenizer": str.split, "token_pattern": None},
+    {"preprocessor": str.lower},
+    {"ngram_range": (1, 2)},
+    {"token_pattern": r"[a-z]+ [a-z]+"},
+])
+def test_unreproducible_settings_fall_back_to_transform(preprocessed_texts, params):
+    tfidf = TfidfVectorizer(max_features=3000, **params).fit(preprocessed_texts)
+    with pytest.raises(ValueError, match="unsupported settings"):
+        TokenVectorizer.from_vectorizer(tfidf)
+
+    texts = preprocessed_texts[:500]
+    actual = vectorize_tokens([t.split() for t in texts], tfidf)
+    expected = tfidf.transform(texts)
+    assert actual.dtype == expected.dtype
+    assert (actual != expected).nnz == 0